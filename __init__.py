@@ -1,6 +1,6 @@
 NAME = 'sch_viewer_pkg'
 
-__all__ = ['tnavconstants', 'keywords', 'model', 'parser']
+__all__ = ['tnavconstants', 'keywords', 'model', 'parser', 'diff', 'views', 'timeline', 'scenarios', 'records', 'store', 'validation', 'serialization']
 
 
 
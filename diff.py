@@ -0,0 +1,156 @@
+import re
+from collections import defaultdict, deque
+from datetime import datetime
+from hashlib import blake2b
+from typing import Dict, List, Tuple
+
+import pandas as pd
+
+from .keywords import tNavigatorKeyword
+
+__version__ = '0.1'
+
+ADDED = 'added'
+REMOVED = 'removed'
+MODIFIED = 'modified'
+FORMATTING = 'formatting'
+
+# значение в кавычках | конец записи | простое значение
+re_token = re.compile(r"'[^']*'|/|[^\s/']+")
+
+def normalize_body(keyword: tNavigatorKeyword) -> str:
+    '''Нормализованный текст ключевого слова: поток значений без комментариев, переносов строк и лишних пробелов.
+    Используется для сравнения содержательной части ключевого слова (перенос записи на другую строку - форматирование)'''
+    # комментарий обрезается до конца строки, перенос строки заменяется пробелом, чтобы соседние строки не склеивались
+    text = ' '.join(line.split('--', 1)[0] for line in keyword.body[1:])
+    return ' '.join([keyword.name] + re_token.findall(text))
+
+def keyword_fingerprint(keyword: tNavigatorKeyword) -> Tuple[bytes, bytes]:
+    '''Отпечаток ключевого слова: (хеш полного текста, хеш нормализованного текста)'''
+    raw = blake2b(keyword.get_body_text().encode('utf-8'), digest_size=16).digest()
+    norm = blake2b(normalize_body(keyword).encode('utf-8'), digest_size=16).digest()
+    return raw, norm
+
+class tNavigatorKeywordChange(object):
+    '''Класс tNavigatorKeywordChange: одно изменение ключевого слова
+    change: str - тип изменения (added, removed, modified, formatting)
+    date: datetime - дата
+    old: tNavigatorKeyword - ключевое слово в исходном расписании (None для added)
+    new: tNavigatorKeyword - ключевое слово в новом расписании (None для removed)'''
+    def __init__(self, change: str, date: datetime, old: tNavigatorKeyword = None, new: tNavigatorKeyword = None) -> None:
+        self.change = change
+        self.date = date
+        self.old = old
+        self.new = new
+
+    @property
+    def keyword(self) -> tNavigatorKeyword:
+        return self.new if self.new is not None else self.old
+
+    @property
+    def name(self) -> str:
+        return self.keyword.name
+
+    @property
+    def include_path(self) -> str:
+        return self.keyword.include_path
+
+    @property
+    def structural(self) -> bool:
+        '''Изменение затрагивает содержательную часть (не только пробелы/комментарии)'''
+        return self.change != FORMATTING
+
+    def __str__(self) -> str:
+        return f'{self.date} {self.include_path} {self.name}: {self.change}'
+
+class tNavigatorScheduleDiff(object):
+    '''Класс tNavigatorScheduleDiff: структурное сравнение двух SCHEDULE-секций
+    Ключевые слова сопоставляются по дате и файлу (include_path) через хеши текста, без построчного сравнения файлов
+    old: dict - исходные данные { datetime: list of tNavigatorKeyword }
+    new: dict - новые данные { datetime: list of tNavigatorKeyword }'''
+    def __init__(self, old: Dict[datetime, List[tNavigatorKeyword]], new: Dict[datetime, List[tNavigatorKeyword]]) -> None:
+        self.changes: List[tNavigatorKeywordChange] = []
+        for date in sorted(set(old) | set(new)):
+            old_groups = tNavigatorScheduleDiff.__group_by_file(old.get(date, []))
+            new_groups = tNavigatorScheduleDiff.__group_by_file(new.get(date, []))
+            for path in list(dict.fromkeys([*old_groups, *new_groups])):
+                self.changes += tNavigatorScheduleDiff.__compare(date, old_groups.get(path, []), new_groups.get(path, []))
+
+    @staticmethod
+    def __group_by_file(keywords: List[tNavigatorKeyword]) -> Dict[str, List[tNavigatorKeyword]]:
+        groups = defaultdict(list)
+        for kw in keywords:
+            groups[kw.include_path].append(kw)
+        return groups
+
+    @staticmethod
+    def __compare(date: datetime, old: List[tNavigatorKeyword], new: List[tNavigatorKeyword]) -> List[tNavigatorKeywordChange]:
+        '''Сопоставление ключевых слов одной даты и одного файла.
+        Последовательно: полное совпадение текста, совпадение нормализованного текста, совпадение имени (по порядку)'''
+        old_fp = [keyword_fingerprint(x) for x in old]
+        new_fp = [keyword_fingerprint(x) for x in new]
+        old_left = set(range(len(old)))
+        new_left = set(range(len(new)))
+        changes = []
+
+        def match(key, change):
+            index = defaultdict(deque)
+            for i in sorted(old_left):
+                index[key(i, old, old_fp)].append(i)
+            for j in sorted(new_left):
+                candidates = index.get(key(j, new, new_fp))
+                if candidates:
+                    i = candidates.popleft()
+                    old_left.discard(i)
+                    new_left.discard(j)
+                    if change != None:
+                        changes.append(tNavigatorKeywordChange(change, date, old[i], new[j]))
+
+        match(lambda i, kws, fps: fps[i][0], None)
+        match(lambda i, kws, fps: fps[i][1], FORMATTING)
+        match(lambda i, kws, fps: kws[i].name, MODIFIED)
+        changes += [tNavigatorKeywordChange(REMOVED, date, old=old[i]) for i in sorted(old_left)]
+        changes += [tNavigatorKeywordChange(ADDED, date, new=new[j]) for j in sorted(new_left)]
+        return changes
+
+    @property
+    def structural(self) -> List[tNavigatorKeywordChange]:
+        '''Изменения содержательной части (added, removed, modified)'''
+        return [x for x in self.changes if x.structural]
+
+    @property
+    def formatting(self) -> List[tNavigatorKeywordChange]:
+        '''Изменения только пробелов/комментариев'''
+        return [x for x in self.changes if not x.structural]
+
+    def by_date(self, structural_only: bool = False) -> Dict[datetime, List[tNavigatorKeywordChange]]:
+        '''Изменения, сгруппированные по дате { datetime: list of tNavigatorKeywordChange }'''
+        result = defaultdict(list)
+        for change in (self.structural if structural_only else self.changes):
+            result[change.date].append(change)
+        return dict(result)
+
+    def by_file(self, structural_only: bool = False) -> Dict[str, List[tNavigatorKeywordChange]]:
+        '''Изменения, сгруппированные по файлу { include_path: list of tNavigatorKeywordChange }'''
+        result = defaultdict(list)
+        for change in (self.structural if structural_only else self.changes):
+            result[change.include_path].append(change)
+        return dict(result)
+
+    def to_dataframe(self) -> pd.DataFrame:
+        '''Конвертировать список изменений в pandas.DataFrame'''
+        list = []
+        for x in self.changes:
+            list.append({'date': x.date, 'keyword': x.name, 'include': x.include_path, 'change': x.change,
+                         'old': x.old.get_body_text() if x.old is not None else '',
+                         'new': x.new.get_body_text() if x.new is not None else ''})
+        return pd.DataFrame.from_dict(list, orient='columns') if list else pd.DataFrame(columns=['date', 'keyword', 'include', 'change', 'old', 'new'])
+
+    def __len__(self) -> int:
+        return len(self.changes)
+
+    def __str__(self) -> str:
+        return f"Структурных изменений: {len(self.structural)}\nИзменений форматирования: {len(self.formatting)}"
+
+if __name__ == '__main__':
+    print(tNavigatorScheduleDiff.__doc__)
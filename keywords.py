@@ -1,10 +1,59 @@
 from . import tnavconstants as tnav
 from datetime import datetime, date, time, timedelta
+from typing import Callable, List, Union
 import re
 import pandas as pd
 
 __version__ = '1.0.0'
 
+class KeywordRegistry(object):
+    '''Класс KeywordRegistry: реестр классов ключевых слов и грамматик их значений (поиск за O(1) по имени ключевого слова).
+    Наследники tNavigatorKeyword регистрируются автоматически по имени класса (оно совпадает с ключевым словом),
+    кроме объявленных с abstract=True (промежуточные базовые классы: class MyBase(tNavigatorKeyword, abstract=True)).
+    Список ключевых слов, известных парсеру (tnav.keywords), изменяется только явно: register_class(..., add_keyword=True)
+    Грамматика значения - скомпилированное регулярное выражение (одна запись = одно совпадение, результат get_value - pandas.DataFrame)
+    или функция parser(keyword), результат которой возвращает get_value'''
+    def __init__(self) -> None:
+        self.__classes = {}
+        self.__grammars = {}
+
+    def register_class(self, keyword_class: type, name: str = None, add_keyword: bool = False):
+        '''Зарегистрировать класс ключевого слова
+        keyword_class: type - наследник tNavigatorKeyword
+        name: str = None - ключевое слово (по умолчанию имя класса)
+        add_keyword: bool = False - добавить ключевое слово в список известных парсеру (tnav.keywords),
+            чтобы парсер выделял его в файлах модели'''
+        name = (name if name != None else keyword_class.__name__).upper()
+        self.__classes[name] = keyword_class
+        if add_keyword:
+            tnav.keywords.add(name)
+
+    def register_grammar(self, name: str, grammar: Union[str, re.Pattern, Callable]):
+        '''Зарегистрировать грамматику значения ключевого слова
+        name: str - ключевое слово
+        grammar: str | re.Pattern | Callable - регулярное выражение (строка компилируется один раз) или функция parser(keyword)'''
+        if isinstance(grammar, str):
+            grammar = re.compile(grammar, re.MULTILINE)
+        self.__grammars[name.upper()] = grammar
+
+    def get_class(self, name: str) -> type:
+        '''Класс ключевого слова (tNavigatorKeyword, если специальный класс не зарегистрирован)
+        name: str - ключевое слово'''
+        return self.__classes.get(name.upper(), tNavigatorKeyword)
+
+    def get_grammar(self, name: str) -> Union[re.Pattern, Callable]:
+        '''Грамматика значения ключевого слова (None, если не зарегистрирована)
+        name: str - ключевое слово'''
+        return self.__grammars.get(name.upper())
+
+    def __contains__(self, name: str) -> bool:
+        return name.upper() in self.__classes
+
+registry = KeywordRegistry()
+for key, pattern in tnav.re_compiled.items():
+    if key != 'keyword':
+        registry.register_grammar(key, pattern)
+
 class tNavigatorKeyword(object):
     '''Класс tNavigatorKeyword: Описывает одно ключевое слово  
     name: str - название ключевого слова
@@ -16,6 +65,11 @@ class tNavigatorKeyword(object):
         self.__immutable = False
         self.__nref=1
 
+    def __init_subclass__(cls, abstract: bool = False, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if not abstract:
+            registry.register_class(cls)
+
     @property
     def immutable(self):
         return self.__immutable
@@ -52,6 +106,9 @@ class tNavigatorKeyword(object):
         line: str - строка, которая будет добавлена'''
         if not line.endswith('\n'):
             line = line+'\n'
+        # разделяемое (интернированное или загруженное serialization) тело не изменяем, а копируем
+        if not isinstance(self.body, list):
+            self.body = list(self.body)
         self.body.append(line)
 
     def get_body_text(self) -> str:
@@ -63,7 +120,8 @@ class tNavigatorKeyword(object):
 
     def set_body_text(self, text: str):
         '''Установить текст ключевого слова
-        text: str - текст ключевого слова, разжеленный Enter'''
+        text: str - текст ключевого слова, разжеленный Enter
+        Интернированное тело не изменяется, вместо него создается новый список строк'''
         if not self.immutable:
             self.body = text.splitlines(keepends=True)
             if not self.body[-1].endswith('\n'):
@@ -91,12 +149,14 @@ class tNavigatorKeyword(object):
 
     def get_value(self):
         '''Получить значение ключевого слова'''
-        if self.name in tnav.re_pattern:
-            re_template = tnav.re_pattern[self.name]
+        grammar = registry.get_grammar(self.name)
+        if grammar is not None and not isinstance(grammar, re.Pattern):
+            return grammar(self)
+        elif grammar is not None:
             values = []
             lines = self.get_body_value_lines()
             for line in lines:
-                search = re.search(re_template, line.replace('\n', ' ')+'/', re.MULTILINE) 
+                search = grammar.search(line.replace('\n', ' ')+'/') 
                 if search:
                     values.append(search.groupdict())
             if len(values) == len(lines):   
@@ -111,20 +171,46 @@ class tNavigatorKeyword(object):
     
     def get_comment(self) -> str:
         '''Получить коментарий ключевого слова. Берется только первый коментарий, сразу после ключевого слова'''
-        search = re.search(tnav.re_pattern['keyword'], self.get_body_text(), re.MULTILINE)
+        search = tnav.re_compiled['keyword'].search(self.get_body_text())
         return search.group('comment') if search else None
     
-    # TODO is_correct не реализовано, должно быть переопределено в дочерних классах
     def is_correct(self) -> bool:
-        '''Проверка на корректность ключевого слова'''      
-        # 1. начинается c ключевого слова и это ключевое слово == self.name
-        # 2. каждое значение заканчивается символом /
-        # 3. ключевое слово заканчивается символом / (за исключением тех, что в списке keywords_without_slash_symbol)
+        '''Быстрая проверка при добавлении в модель: первая строка начинается с ключевого слова self.name.
+        Полная проверка (записи, символ /, даты, файлы INCLUDE) - validation.validate_model'''      
         if len(self.body)>0:
-            if re.match(rf"(?i)^\s*{self.name}\s*", self.body[0]):
+            search = tnav.re_compiled['keyword'].match(self.body[0])
+            if search and search.group('keyword').upper() == self.name:
                 return True
         return False
 
+class KeywordBodyPool(object):
+    '''Класс KeywordBodyPool: пул интернированных тел ключевых слов.
+    Одинаковые строки и одинаковые тела ключевых слов хранятся в одном экземпляре (неизменяемый tuple).
+    При изменении ключевого слова (add_line, set_body_text) разделяемое тело не меняется, а копируется'''
+    def __init__(self) -> None:
+        self.__lines = {}
+        self.__bodies = {}
+
+    def intern(self, keyword: tNavigatorKeyword) -> tNavigatorKeyword:
+        '''Заменить тело ключевого слова на разделяемый экземпляр из пула
+        keyword: tNavigatorKeyword - ключевое слово'''
+        body = tuple(self.__lines.setdefault(line, line) for line in keyword.body)
+        keyword.body = self.__bodies.setdefault(body, body)
+        return keyword
+
+    def intern_lines(self, lines: List[str]) -> List[str]:
+        '''Заменить строки на разделяемые экземпляры из пула (например, строки прочитанного файла до разбора ключевых слов)
+        lines: List[str] - строки'''
+        return [self.__lines.setdefault(line, line) for line in lines]
+
+    def clear(self):
+        '''Очистить пул (уже интернированные тела ключевых слов остаются разделяемыми)'''
+        self.__lines.clear()
+        self.__bodies.clear()
+
+    def __len__(self) -> int:
+        return len(self.__bodies)
+
 class DATES(tNavigatorKeyword):
     '''Класс DATES(tNavigatorKeyword): Описывает ключевое слово DATES'''
     def __init__(self, name: str='DATES', include_path='') -> None:
@@ -135,7 +221,7 @@ class DATES(tNavigatorKeyword):
 
     def get_value(self) -> datetime:
         s = self.get_body_text_without_keyword()
-        dt = re.search(tnav.re_pattern[self.name], s, re.MULTILINE)
+        dt = tnav.re_compiled[self.name].search(s)
         if dt:
             day = dt.group('day')
             month = dt.group('month').upper()
@@ -165,7 +251,7 @@ class INCLUDE(tNavigatorKeyword):
             raise KeyError
 
     def get_value(self) -> str:
-        search = re.search(tnav.re_pattern[self.name], self.get_body_text(), re.MULTILINE)
+        search = tnav.re_compiled[self.name].search(self.get_body_text())
         if search:
             return search.group('path')
         else:
@@ -174,7 +260,7 @@ class INCLUDE(tNavigatorKeyword):
 
     def set_value(self, path) -> str:
         text = self.get_body_text()
-        search = re.search(tnav.re_pattern[self.name], text, re.MULTILINE)
+        search = tnav.re_compiled[self.name].search(text)
         if search:
             text = text.replace(search.group('path'), path)
             self.set_body_text(text)
@@ -192,7 +278,7 @@ class TSTEP(tNavigatorKeyword):
             raise KeyError
 
     def get_value(self) -> timedelta:
-        search = re.findall(tnav.re_pattern[self.name], self.get_body_text(), re.MULTILINE) 
+        search = tnav.re_compiled[self.name].findall(self.get_body_text()) 
         sum = 0
         for str in search:
             days = float(str[-2])
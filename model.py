@@ -1,6 +1,8 @@
+import asyncio
 import copy
-from typing import List, Dict
-from datetime import datetime
+from concurrent.futures import Executor
+from typing import Callable, List, Dict, Union
+from datetime import datetime, timedelta
 from os import getcwd, makedirs
 from os.path import (abspath, basename, dirname, exists, join, normpath, splitext)
 from shutil import copyfile
@@ -9,6 +11,10 @@ import networkx as nx
 import pandas as pd
 
 from .keywords import *
+from .diff import tNavigatorScheduleDiff
+from .views import tNavigatorModelView
+from .timeline import tNavigatorTimeline
+from .validation import ValidationReport, validate_model
 
 __version__ = '0.1'
 
@@ -17,15 +23,19 @@ class tNavigatorModel(object):
     Внутренне представлен в виде словаря { datetime: list of tNavigatorKeyword }
     start: datetime = None - стартовая дата модели. Все последующие даты должны быть больше чем она
     keywords_list: list of tNavigatorKeyword = [] - список ключевых слов, из которых собрается модель
-    basepath: str = None - путь к файлу с ключевым словом SCHEDULE'''
-    def __init__(self, start: datetime = None, keywords_list: list = [], basepath: str = None, schedule_path: str=None) -> None:
+    basepath: str = None - путь к файлу с ключевым словом SCHEDULE
+    body_pool: KeywordBodyPool = None - пул для интернирования одинаковых тел ключевых слов (None - без интернирования)
+    source_sch: dict = None - исходные данные SCHEDULE секции (по умолчанию копия данных, построенных из keywords_list)'''
+    def __init__(self, start: datetime = None, keywords_list: list = [], basepath: str = None, schedule_path: str=None, body_pool: KeywordBodyPool = None, source_sch: dict = None) -> None:
         self.__start = start
         self.__sch_data = dict()
+        self.__timeline = None
         self.__basepath = basepath
         self.__schedule_path = schedule_path if schedule_path!=None else basepath
        
         # список файлов, ссылки на которые встречаются более 1 раза
         self.immutable_files={}
+        self.body_pool = body_pool
 
         self.schedule_kw = tNavigatorKeyword('SCHEDULE')
         self.schedule_kw.add_line('SCHEDULE')
@@ -45,7 +55,7 @@ class tNavigatorModel(object):
                     date = date + kw.get_value()
                 self.add_keyword(date, kw, add_date_kw=False)
 
-        self.__source_sch = copy.deepcopy(self.schedule_data)
+        self.__source_sch = copy.deepcopy(self.schedule_data) if source_sch is None else source_sch
         
 
     @property
@@ -56,6 +66,16 @@ class tNavigatorModel(object):
         else:
             return None
 
+    @property
+    def basepath(self) -> str:
+        '''Путь к главному файлу модели (*.DATA)'''
+        return self.__basepath
+
+    @property
+    def schedule_path(self) -> str:
+        '''Путь к файлу с ключевым словом SCHEDULE'''
+        return self.__schedule_path
+
     @property
     def model_dirname(self):
         if self.__basepath!=None:
@@ -68,10 +88,7 @@ class tNavigatorModel(object):
     def get_keyword_class(class_name: str):
         '''Получает конкретную реализацию класса tNavigatorKeyword по ключевому слову (оно совпадает с именем класса)
         class_name: str - имя класса/ключевое слово'''
-        for subclass in tNavigatorKeyword.__subclasses__():
-            if subclass.__name__ == class_name.upper():
-                return subclass
-        return tNavigatorKeyword
+        return registry.get_class(class_name)
 
     @property
     def schedule_data(self) -> Dict[datetime, tNavigatorKeyword]:
@@ -82,6 +99,23 @@ class tNavigatorModel(object):
     def schedule_data(self, sch_data) -> Dict[datetime, tNavigatorKeyword]:  
         '''Данные SCHEDULE секции в виде словаря  { datetime : list of tNavigatorKeyword }'''    
         self.__sch_data = sch_data
+        self.__timeline = None
+
+    @property
+    def timeline(self) -> tNavigatorTimeline:
+        '''Временная шкала модели (строится при первом обращении и обновляется при редактировании через методы модели).
+        При прямом изменении schedule_data необходимо вызвать timeline.rebuild(schedule_data)'''
+        if self.__timeline is None:
+            self.__timeline = tNavigatorTimeline(self.schedule_data)
+        return self.__timeline
+
+    def __timeline_add(self, date: datetime, n: int = 1):
+        if self.__timeline is not None:
+            self.__timeline.add(date, n)
+
+    def __timeline_remove(self, date: datetime, n: int = None):
+        if self.__timeline is not None:
+            self.__timeline.remove(date, n)
 
     @property
     def source_sch(self) -> Dict[datetime, tNavigatorKeyword]:
@@ -116,6 +150,8 @@ class tNavigatorModel(object):
             raise KeyError (f'Ключевое слово {keyword.name} не может быть добавлено в модель. Дата ключевого слова НЕ должна быть меньше стартовой')
         keyword.__class__ = tNavigatorModel.get_keyword_class(keyword.name)
         if keyword.is_correct():
+            if self.body_pool is not None:
+                self.body_pool.intern(keyword)
             if date in self.schedule_data: 
                 if keyword.include_path == '' and len(self.schedule_data[date]) > 0:
                     keyword.include_path = self.schedule_data[date][-1].include_path 
@@ -137,6 +173,7 @@ class tNavigatorModel(object):
                
                 keyword.immutable = keyword.include_path in self.immutable_files
                 self.schedule_data[date].append(keyword)
+                self.__timeline_add(date)
             else: 
                 if keyword.include_path == '':
                     prev = [x for x in self.schedule_data.keys() if x < date] 
@@ -146,14 +183,187 @@ class tNavigatorModel(object):
                 if add_date_kw and keyword.name != 'DATES':
                     datekw = DATES(include_path=keyword.include_path)
                     datekw.set_value(date)
+                    if self.body_pool is not None:
+                        self.body_pool.intern(datekw)
                     self.schedule_data[date]=[datekw]
                     self.schedule_data[date].append(keyword)
                 else:
                     self.schedule_data[date]=[keyword]
+                self.__timeline_add(date, len(self.schedule_data[date]))
             return keyword
         else:
             raise ValueError (f'Ключевое слово {keyword.name} не может быть добавлено в модель. Проверьте корректность значений')
 
+    def intern_bodies(self, body_pool: KeywordBodyPool = None) -> KeywordBodyPool:
+        '''Включить интернирование тел ключевых слов и интернировать уже добавленные ключевые слова
+        body_pool: KeywordBodyPool = None - пул (при None используется текущий или создается новый)'''
+        if body_pool is not None:
+            self.body_pool = body_pool
+        elif self.body_pool is None:
+            self.body_pool = KeywordBodyPool()
+        for kw in self.find_keywords():
+            self.body_pool.intern(kw)
+        return self.body_pool
+
+    def body_stats(self) -> Dict[str, float]:
+        '''Статистика хранения текста ключевых слов: общее кол-во строк/символов и кол-во уникальных экземпляров.
+        dedup_ratio - во сколько раз текст занимает меньше памяти за счет разделяемых строк'''
+        keywords = self.find_keywords()
+        lines = 0
+        chars = 0
+        unique = {}
+        for kw in keywords:
+            lines += len(kw.body)
+            for line in kw.body:
+                chars += len(line)
+                unique[id(line)] = len(line)
+        unique_chars = sum(unique.values())
+        return {'keywords': len(keywords),
+                'unique_bodies': len({id(kw.body) for kw in keywords}),
+                'lines': lines,
+                'unique_lines': len(unique),
+                'chars': chars,
+                'unique_chars': unique_chars,
+                'dedup_ratio': chars/unique_chars if unique_chars > 0 else 1.0}
+
+    def view(self, start: datetime = None, end: datetime = None) -> tNavigatorModelView:
+        '''Представление модели на интервале дат [start, end) без копирования ключевых слов
+        start: datetime = None - начало интервала (включительно)
+        end: datetime = None - конец интервала (не включительно)'''
+        return tNavigatorModelView(self.schedule_data, start, end, self.timeline)
+
+    @staticmethod
+    def __shift_dates(items: List[tuple], offset: Union[timedelta, pd.DateOffset]) -> List[datetime]:
+        '''Новые даты интервала: даты с ключевым словом DATES смещаются на offset,
+        остальные (заданные TSTEP) сохраняют шаг относительно предыдущей даты'''
+        new_dates = []
+        for i, (date, keywords) in enumerate(items):
+            if i == 0 or any(x.name == 'DATES' for x in keywords):
+                new_dates.append((pd.Timestamp(date) + offset).to_pydatetime())
+            else:
+                new_dates.append(new_dates[-1] + (date - items[i-1][0]))
+        return new_dates
+
+    def __has_dates_kw(self, date: datetime) -> bool:
+        return any(x.name == 'DATES' for x in self.schedule_data[date])
+
+    def __check_next_date(self, n: int):
+        '''Дата, следующая за перенесенным/вставленным интервалом (номер шага n), должна задаваться DATES:
+        дата, заданная TSTEP, отсчитывается от последней даты интервала и после переноса разошлась бы с моделью'''
+        if n < len(self.timeline):
+            date = self.timeline.step_date(n)
+            if not self.__has_dates_kw(date):
+                raise ValueError(f'Дата {date} после интервала задается TSTEP относительно последней даты интервала, интервал не может быть перенесен перед ней')
+
+    def __check_range(self, i: int, j: int, new_dates: List[datetime]):
+        '''Проверка, что перенесенный интервал дат (шаги i..j-1) не нарушает порядок модели'''
+        if len(set(new_dates)) != len(new_dates) or new_dates != sorted(new_dates):
+            raise ValueError('Смещение нарушает порядок дат внутри интервала')
+        if new_dates[0] <= self.start:
+            raise ValueError('Даты интервала после смещения должны быть больше стартовой даты модели')
+        if not self.__has_dates_kw(self.timeline.step_date(i)):
+            raise ValueError(f'Первая дата интервала {self.timeline.step_date(i)} должна задаваться ключевым словом DATES')
+        # на новом месте [k, m) могут находиться только даты самого интервала [i, j)
+        k, m = self.timeline.bounds(new_dates[0], new_dates[-1] + timedelta(microseconds=1))
+        if k < m and (k < i or m > j):
+            raise ValueError(f'Интервал после смещения пересекается с датой {self.timeline.step_date(k if k < i else j)}, не входящей в интервал')
+        self.__check_next_date(j if i <= m < j else m)
+
+    def __check_removable(self, dates: List[datetime]):
+        '''Удаляемые даты не должны содержать неизменяемых ключевых слов (см. delete_keywords)'''
+        for date in dates:
+            for kw in self.schedule_data[date]:
+                if kw.immutable:
+                    raise ValueError(f'Дата {date} содержит ключевое слово из файла, на который несколько ссылок, дата не может быть удалена\n{kw}')
+
+    def __set_dates(self, date: datetime, keywords: List[tNavigatorKeyword]):
+        for kw in keywords:
+            if kw.name == 'DATES':
+                if kw.immutable:
+                    raise ValueError(f'Ключевое слово {kw.name} находится в файле, на который несколько ссылок, дата не может быть изменена\n{kw}')
+                kw.set_value(date)
+                if self.body_pool is not None:
+                    self.body_pool.intern(kw)
+
+    def shift_dates(self, offset: Union[timedelta, pd.DateOffset], start: datetime = None, end: datetime = None) -> List[datetime]:
+        '''Сместить интервал дат [start, end) на offset, переписав ключевые слова DATES. Возвращает новые даты интервала.
+        Даты сразу после интервала, заданные TSTEP, смещаются вместе с интервалом (сохраняя шаг)
+        offset: timedelta | pandas.DateOffset - смещение (например, pd.DateOffset(months=3))
+        start: datetime = None - начало интервала (включительно)
+        end: datetime = None - конец интервала (не включительно)'''
+        timeline = self.timeline
+        i, j = timeline.bounds(start, end)
+        if i == j:
+            return []
+        # TSTEP отсчитывается от предыдущей даты, поэтому следующие за интервалом даты TSTEP переносятся вместе с ним
+        while j < len(timeline) and not self.__has_dates_kw(timeline.step_date(j)):
+            j += 1
+        dates = timeline.dates[i:j].tolist()
+        items = [(x, self.schedule_data[x]) for x in dates]
+        new_dates = tNavigatorModel.__shift_dates(items, offset)
+        self.__check_range(i, j, new_dates)
+        for date, keywords in items:
+            if any(x.immutable for x in keywords if x.name == 'DATES'):
+                raise ValueError(f'Дата {date} задается в файле, на который несколько ссылок, и не может быть изменена')
+        moved = [self.schedule_data.pop(x) for x in dates]
+        for date in dates:
+            self.__timeline_remove(date)
+        for date, keywords in zip(new_dates, moved):
+            self.__set_dates(date, keywords)
+            self.schedule_data[date] = keywords
+            self.__timeline_add(date, len(keywords))
+        return new_dates
+
+    def truncate(self, start: datetime = None, end: datetime = None) -> Dict[datetime, List[tNavigatorKeyword]]:
+        '''Оставить в модели только интервал дат [start, end). Возвращает удаленные данные { datetime: list of tNavigatorKeyword }.
+        Первая оставляемая дата должна задаваться DATES (дата TSTEP отсчитывается от удаляемой даты),
+        удаляемые даты не должны содержать ключевых слов из файлов, на которые несколько ссылок
+        start: datetime = None - начало интервала (включительно)
+        end: datetime = None - конец интервала (не включительно)'''
+        i, j = self.timeline.bounds(start, end)
+        if 0 < i < j and not self.__has_dates_kw(self.timeline.step_date(i)):
+            raise ValueError(f'Дата {self.timeline.step_date(i)} задается TSTEP относительно удаляемой даты, интервал не может начинаться с нее')
+        dates = self.timeline.dates[:i].tolist() + self.timeline.dates[j:].tolist()
+        self.__check_removable(dates)
+        for date in dates:
+            self.__timeline_remove(date)
+        return {x: self.schedule_data.pop(x) for x in dates}
+
+    def splice(self, source: tNavigatorModelView, offset: Union[timedelta, pd.DateOffset] = None) -> List[datetime]:
+        '''Вставить в модель копию интервала source (со смещением offset), заменив ключевые слова модели на этом интервале.
+        Возвращает даты вставленного интервала. Дата модели сразу после интервала должна задаваться DATES (не TSTEP),
+        заменяемые даты модели не должны содержать ключевых слов из файлов, на которые несколько ссылок
+        source: tNavigatorModelView - интервал другой (или этой же) модели, см. view()
+        offset: timedelta | pandas.DateOffset = None - смещение вставляемого интервала'''
+        items = list(source.items())
+        if len(items) == 0:
+            return []
+        dates = [x for x, _ in items]
+        new_dates = dates if offset is None else tNavigatorModel.__shift_dates(items, offset)
+        if not any(x.name == 'DATES' for x in items[0][1]):
+            raise ValueError(f'Первая дата интервала {dates[0]} должна задаваться ключевым словом DATES')
+        if new_dates[0] <= self.start:
+            raise ValueError('Даты вставляемого интервала должны быть больше стартовой даты модели')
+        if len(set(new_dates)) != len(new_dates) or new_dates != sorted(new_dates):
+            raise ValueError('Смещение нарушает порядок дат внутри интервала')
+        i, j = self.timeline.bounds(new_dates[0], new_dates[-1] + timedelta(microseconds=1))
+        self.__check_next_date(j)
+        self.__check_removable(self.timeline.dates[i:j].tolist())
+        copied = copy.deepcopy([x for _, x in items])
+        for keywords in copied:
+            for kw in keywords:
+                kw.immutable = kw.include_path in self.immutable_files
+                if kw.immutable and kw.name == 'DATES':
+                    raise ValueError(f'Ключевое слово {kw.name} попадает в файл, на который несколько ссылок, интервал не может быть вставлен\n{kw}')
+        for date in self.timeline.dates[i:j].tolist():
+            self.schedule_data.pop(date)
+            self.__timeline_remove(date)
+        for date, keywords in zip(new_dates, copied):
+            self.__set_dates(date, keywords)
+            self.schedule_data[date] = keywords
+            self.__timeline_add(date, len(keywords))
+        return new_dates
+
     def build_include_graph(self):
         graph = nx.DiGraph()
         inc_keywords = self.find_keywords(keyword='INCLUDE')
@@ -170,6 +380,7 @@ class tNavigatorModel(object):
         keyword: str = None - название ключевого слова
         comment: str = None - коментарий ключевого слова (без --)'''
         if keyword == None and comment == None:
+            self.__timeline_remove(date)
             return self.schedule_data.pop(date, [])
         else:
             deleted = self.find_keywords(date, keyword, comment)
@@ -178,9 +389,12 @@ class tNavigatorModel(object):
                     self.schedule_data[date].remove(item)
                 else:
                     print(f'Ключевое слово {item} не было удалено, так как находится в файле на который несколько ссылок')
+            deleted = [x for x in deleted if not x.immutable]
+            if len(deleted) > 0:
+                self.__timeline_remove(date, len(deleted))
             if len(self.schedule_data[date]) == 0:
                 self.schedule_data.pop(date)
-            return [x for x in deleted if not x.immutable]
+            return deleted
 
             
     def find_keywords(self, date: datetime = None, keyword: str = None, comment: str = None) -> List[tNavigatorKeyword]:
@@ -218,6 +432,13 @@ class tNavigatorModel(object):
                     changed_files[key] = value
         return changed_files
 
+    def diff(self, other: 'tNavigatorModel' = None) -> tNavigatorScheduleDiff:
+        '''Структурное сравнение SCHEDULE-секций по ключевым словам (added, removed, modified, formatting)
+        other: tNavigatorModel = None - модель, с которой сравнивается текущая. При None сравниваются source_sch и schedule_data'''
+        if other is None:
+            return tNavigatorScheduleDiff(self.source_sch, self.schedule_data)
+        return tNavigatorScheduleDiff(self.schedule_data, other.schedule_data)
+
     def __generate_new_file_names(self, new_name):
         def get_new_name(name):
             if name.startswith('USER'):
@@ -244,14 +465,29 @@ class tNavigatorModel(object):
                         fnames[f] = get_new_name(f)
         return fnames
 
-    def save_as(self, new_name:str, makebackup: bool=False):
-        '''Сохранить как
-        new_name - новое имя модели (БЕЗ РАСШИРЕНИЯ)
-        makebackup - делать бекап файлов'''
+    def __snapshot(self) -> 'tNavigatorModel':
+        '''Копия модели для подготовки сохранения: копируются списки ключевых слов, объекты ключевых слов и списки строк,
+        сами строки и разделяемые (неизменяемые) тела не копируются. Изменения модели после вызова в копию не попадают'''
+        snapshot = copy.copy(self)
+        data = {}
+        for date, keywords in self.schedule_data.items():
+            data[date] = []
+            for kw in keywords:
+                kw = copy.copy(kw)
+                if isinstance(kw.body, list):
+                    kw.body = list(kw.body)
+                data[date].append(kw)
+        snapshot.schedule_data = data
+        snapshot.immutable_files = dict(self.immutable_files)
+        return snapshot
+
+    def _prepare_save(self, new_name: str) -> List[tuple]:
+        '''Подготовка сохранения: список (исходный файл, новый файл, содержимое). Содержимое None - файл копируется без изменений.
+        Переименовывает ссылки INCLUDE в самой модели, поэтому вызывается для копии модели (см. __snapshot).
+        Имя без __, так как метод передается через pickle в ProcessPoolExecutor (см. save_as_async)
+        new_name - новое имя модели (БЕЗ РАСШИРЕНИЯ)'''
         if new_name==self.model_name:
             raise ValueError("Нельзя сохранить модель под тем же именем")
-        # копируем модель во временную переменую 
-        temp = copy.deepcopy(self.schedule_data)
         fnames=self.__generate_new_file_names(new_name)
         # изменяем все ссылки на ключевые слова
         inc_kw = self.find_keywords(keyword='INCLUDE')
@@ -261,48 +497,101 @@ class tNavigatorModel(object):
                 inc.set_value(fnames[name])
         # получаем новые измененные файлы, именно их мы будем пересохранять
         changed_files = self.get_changed_files()
-        # возвращаем исходные данные в переменную
-        self.schedule_data=copy.deepcopy(temp)
-        #  СОХРАНЕНИЕ
-        now = datetime.now().strftime("%Y%m%d%H%M%S")
+        files = []
         for file, content in changed_files.items():
             if file != '/':
                 src_file=join(self.model_dirname, file)
-                if makebackup:
-                    copyfile(src_file, f'{src_file}.{now}.back')
                 output_file = normpath(join(self.model_dirname, fnames[file]))
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    #самый первый файл, где должна быть секция schedule, дописываем ключевые слова
-                    if file == '/': 
-                        content = self.schedule_kw.body + content + self.end_kw.body
-                    f.writelines(content)
+                files.append((src_file, output_file, content))
 
         src_file = self.__basepath
         output_file = normpath(join(self.model_dirname, new_name+".DATA"))
-        if makebackup:
-               copyfile(src_file, f'{src_file}.{now}.back') 
-
         if '/' in changed_files:        
-            content = self.schedule_kw.body + changed_files['/'] # + self.end_kw.body                
-            #читаем исходный файл и находим индексы ключевых слов SCHEDULE и END 
-            with open(src_file, 'r', encoding='utf-8') as file:
-                lines = file.readlines()
-            start_i = -1
-            end_i = -1
-            for i, line in enumerate(lines):
-                if re.match(r"(?i)^\s*SCHEDULE", line): start_i = i
-                # если встречаем уже встретили SCHEDULE и встречает END, то запоминаем индекс строки    
-                if re.match(r"(?i)^\s*END", line) and start_i >=0: 
-                    end_i = i
-                    content = content + self.end_kw.body                
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.writelines(lines[:start_i])
-                f.writelines(content)
-                if end_i>=0 and len(lines) > end_i+1:
-                    f.writelines(lines[end_i+1:])
+            files.append((src_file, output_file, self.build_data_file(changed_files['/'])))
         else:
+            files.append((src_file, output_file, None))
+        return files
+
+    @staticmethod
+    def __write_file(src_file: str, output_file: str, content: List[str], backup_suffix: str = None):
+        '''Запись одного файла модели (с бекапом исходного файла при backup_suffix != None)'''
+        if backup_suffix != None:
+            copyfile(src_file, f'{src_file}.{backup_suffix}.back')
+        if content is None:
             copyfile(src_file, output_file)
-       
+        else:
+            with open(output_file, 'w', encoding='utf-8') as f:
+                f.writelines(content)
+
+    def validate(self, processes: int = 0, executor: Executor = None) -> ValidationReport:
+        '''Проверить все ключевые слова модели (записи, символ /, возрастание DATES, даты TSTEP, наличие файлов INCLUDE)
+        processes: int = 0 - кол-во процессов для проверки (0 - без пула, см. validation.validate_model)
+        executor: concurrent.futures.Executor = None - уже созданный пул процессов для проверки'''
+        return validate_model(self, processes, executor=executor)
+
+    def save_as(self, new_name:str, makebackup: bool=False, validate: bool=False):
+        '''Сохранить как
+        new_name - новое имя модели (БЕЗ РАСШИРЕНИЯ)
+        makebackup - делать бекап файлов
+        validate - перед сохранением проверить модель, при ошибках модель не сохраняется (ValueError)'''
+        if validate:
+            tNavigatorModel.__raise_on_errors(self.validate())
+        files = self.__snapshot()._prepare_save(new_name)
+        #  СОХРАНЕНИЕ
+        now = datetime.now().strftime("%Y%m%d%H%M%S") if makebackup else None
+        for src_file, output_file, content in files:
+            tNavigatorModel.__write_file(src_file, output_file, content, now)
+
+    @staticmethod
+    def __raise_on_errors(report: ValidationReport):
+        if not report.ok:
+            raise ValueError(f'Модель не сохранена, найдены ошибки\n{report}')
+
+    async def save_as_async(self, new_name: str, makebackup: bool=False, executor: Executor = None, progress: Callable = None, validate: bool=False):
+        '''Асинхронная версия save_as: подготовка файлов выполняется в executor, файлы записываются параллельно.
+        Сохраняется состояние модели на момент вызова: подготовка выполняется над копией модели (см. __snapshot),
+        поэтому изменения модели во время сохранения не теряются и не попадают в сохраняемые файлы.
+        Поддерживает отмену (asyncio.CancelledError): файлы, запись которых еще не началась, не записываются
+        new_name - новое имя модели (БЕЗ РАСШИРЕНИЯ)
+        makebackup - делать бекап файлов
+        executor: concurrent.futures.Executor = None - исполнитель для подготовки файлов (None - пул потоков по умолчанию,
+            при ProcessPoolExecutor копия модели передается в процесс-обработчик через pickle)
+        progress: Callable = None - функция progress(stage: str, done: int, total: int), вызывается после записи каждого файла
+        validate - перед сохранением проверить модель (в executor), при ошибках модель не сохраняется (ValueError)'''
+        loop = asyncio.get_running_loop()
+        snapshot = self.__snapshot()
+        if validate:
+            tNavigatorModel.__raise_on_errors(await loop.run_in_executor(executor, snapshot.validate))
+        files = await loop.run_in_executor(executor, snapshot._prepare_save, new_name)
+        now = datetime.now().strftime("%Y%m%d%H%M%S") if makebackup else None
+        done = 0
+        async def write(src_file, output_file, content):
+            nonlocal done
+            await asyncio.to_thread(tNavigatorModel.__write_file, src_file, output_file, content, now)
+            done += 1
+            if progress != None:
+                progress('save', done, len(files))
+        await asyncio.gather(*[write(*x) for x in files])
+
+    def build_data_file(self, schedule_content: List[str]) -> List[str]:
+        '''Получить строки главного файла модели (*.DATA), в котором SCHEDULE секция заменена на schedule_content
+        schedule_content: List[str] - строки ключевых слов SCHEDULE секции (без SCHEDULE и END)'''
+        content = list(self.schedule_kw.body) + schedule_content # + self.end_kw.body                
+        #читаем исходный файл и находим индексы ключевых слов SCHEDULE и END 
+        with open(self.__basepath, 'r', encoding='utf-8') as file:
+            lines = file.readlines()
+        start_i = -1
+        end_i = -1
+        for i, line in enumerate(lines):
+            if re.match(r"(?i)^\s*SCHEDULE", line): start_i = i
+            # если встречаем уже встретили SCHEDULE и встречает END, то запоминаем индекс строки    
+            if re.match(r"(?i)^\s*END", line) and start_i >=0: 
+                end_i = i
+                content = content + list(self.end_kw.body)                
+        result = lines[:start_i] + content
+        if end_i>=0 and len(lines) > end_i+1:
+            result += lines[end_i+1:]
+        return result
 
     def __get_files(self, data) -> Dict[str, List[str]]:
         files = {} # {имя файла: содержание файла}
@@ -340,6 +629,8 @@ class tNavigatorModel(object):
         if df.empty:
             raise ValueError('Нельзя построить модель из пустого DataFrame')        
         self.schedule_data.clear()
+        if self.__timeline is not None:
+            self.__timeline.rebuild(self.schedule_data)
         if self.start == None:
             self.start = df['date'].min()
         self.schedule_data[self.start]=[]
@@ -353,14 +644,24 @@ class tNavigatorModel(object):
             df = self.to_dataframe()
         if not exists(dirname(abspath(path))):
             makedirs(dirname(abspath(path)))
-        writer = pd.ExcelWriter(path)
-        df.to_excel(writer, index=False)
-        writer.save()
+        with pd.ExcelWriter(path) as writer:
+            df.to_excel(writer, index=False)
+
+    async def export_to_excel_async(self, path: str, df: pd.DataFrame = None, executor: Executor = None):
+        '''Асинхронная версия export_to_excel: формирование таблицы и запись MS Excel выполняются в executor
+        path: str - путь к файлу. обязательно указывать расширение *.xlsx
+        df: pd.DataFrame = None - при значении None экспортируется вся модель
+        executor: concurrent.futures.Executor = None - исполнитель (None - пул потоков по умолчанию)'''
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(executor, self.export_to_excel, path, df)
 
  
-    def add_keywords_from_df(self, df: pd.DataFrame):
+    def add_keywords_from_df(self, df: pd.DataFrame, intern_bodies: bool = False):
         '''Добавить ключевые слова из pandas.DataFrame
-        df: pd.DataFrame - датафреймс данными. Должен содержать колонки ['date', 'keyword', 'body', 'include', 'note']''' 
+        df: pd.DataFrame - датафреймс данными. Должен содержать колонки ['date', 'keyword', 'body', 'include', 'note']
+        intern_bodies: bool = False - интернировать одинаковые тела ключевых слов (включается также, если у модели уже есть body_pool)''' 
+        if intern_bodies and self.body_pool is None:
+            self.body_pool = KeywordBodyPool()
         for i, row in df.iterrows():
             tNav_kw_class = tNavigatorModel.get_keyword_class(row['keyword'])
             inc = row['include']
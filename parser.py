@@ -1,11 +1,15 @@
 from .model import tNavigatorModel
+from .store import tNavigatorSqliteModel
 from .keywords import *
 from . import tnavconstants as tnav
 
+import asyncio
+import copy
 from chardet import detect
+from concurrent.futures import Executor
 from os import listdir
 from os.path import basename, splitext, dirname, join, normpath, exists, relpath, isfile
-from typing import List, Dict
+from typing import Callable, Iterator, List, Dict
 
 __version__ = '0.1.1'
  
@@ -20,7 +24,13 @@ class tNavigatorModelParser(object):
         self.basepath = None
         self.duplicate_links=[]
         self.use_pool = False
+        # интернировать одинаковые тела ключевых слов (экономия памяти на больших моделях)
+        self.intern_bodies = False
+        # путь к базе SQLite: при заданном значении строится tNavigatorSqliteModel (ключевые слова хранятся вне памяти)
+        self.db_path = None
+        # кеш строк файлов модели на время разбора (очищается после построения модели)
         self.files={}
+        self.__body_pool = None
 
     @staticmethod
     def read_lines(path: str) -> List[str]:
@@ -45,6 +55,12 @@ class tNavigatorModelParser(object):
                 return tNavigatorModelParser.read_lines(path)
         else:
             return []
+
+    @staticmethod
+    async def read_lines_async(path: str) -> List[str]:
+        '''Асинхронная версия read_lines (чтение выполняется в отдельном потоке)
+        path: str - путь к файлу'''
+        return await asyncio.to_thread(tNavigatorModelParser.read_lines, path)
         
     def find_schedule_section(self, path: str) -> Dict[str, List[str]]:
         '''Рекурсивный поиск секции SCHEDULE. Возвращает набор строк секции 
@@ -62,8 +78,8 @@ class tNavigatorModelParser(object):
                 # ищем стартовую дату (она одна, в файле с расширением *.DATA)
                 if re.match(r"(?i)(^\s*START)|(^\s*RESTARTDATE)", line):
                     find_start = True                
-                if find_start and re.match(tnav.re_pattern['DATES'], line):
-                    start = re.search(tnav.re_pattern['DATES'], line)
+                if find_start and tnav.re_compiled['DATES'].match(line):
+                    start = tnav.re_compiled['DATES'].search(line)
                     result['start'] = datetime(int(start.group('year')), 
                                         tnav.months_dict[start.group('month').upper()], 
                                         int(start.group('day')))
@@ -74,8 +90,8 @@ class tNavigatorModelParser(object):
                 if re.match(r"(?i)^\s*INCLUDE", line): 
                     find_include = True
                 # запоминаем встречающиеся инклюды, на случай, если секции SCHEDULE не будет в файле *.DATA
-                if find_include and re.match(tnav.re_pattern['INCLUDE'], line):
-                    value = re.search(tnav.re_pattern['INCLUDE'], line).group('path')
+                if find_include and tnav.re_compiled['INCLUDE'].match(line):
+                    value = tnav.re_compiled['INCLUDE'].search(line).group('path')
                     inc_list.append(value)
                     find_include = False
 
@@ -110,77 +126,182 @@ class tNavigatorModelParser(object):
         self.files={}
         if schedule == None:
             raise ScheduleNotFoundError 
-        kwlist = self.parse_schedule_section(schedule['schedule_lines']) 
-        model = tNavigatorModel(schedule['start'], kwlist, basepath=basepath, schedule_path=schedule['file_with_schedule_section'])  
-        return model         
+        return self.build_model_from_schedule(schedule, basepath)
+
+    def build_model_from_schedule(self, schedule: Dict, basepath: str) -> tNavigatorModel:
+        '''Строит модель по найденной SCHEDULE секции (результат find_schedule_section)
+        schedule: dict - результат find_schedule_section
+        basepath:str - путь к файлу *.DATA'''
+        body_pool = KeywordBodyPool() if self.intern_bodies and self.db_path == None else None
+        self.__body_pool = body_pool
+        try:
+            # ключевые слова разбираются по мере добавления в модель (для SQLite - сразу записываются в базу)
+            kwlist = self.iter_schedule_section(schedule['schedule_lines']) 
+            if self.db_path != None:
+                return tNavigatorSqliteModel(self.db_path, schedule['start'], kwlist, basepath=basepath, schedule_path=schedule['file_with_schedule_section'])
+            model = tNavigatorModel(schedule['start'], kwlist, basepath=basepath, schedule_path=schedule['file_with_schedule_section'], body_pool=body_pool)  
+            return model         
+        finally:
+            # строки файлов больше не нужны: кеш удерживал бы в памяти копии строк, не попавшие в пул
+            self.files = {}
+            self.__body_pool = None
+
+    async def build_model_async(self, basepath: str, executor: Executor = None, progress: Callable = None) -> tNavigatorModel:
+        '''Асинхронная версия build_model. Файлы INCLUDE читаются параллельно (по уровням вложенности),
+        разбор ключевых слов и построение модели выполняются в executor.
+        Поддерживает отмену (asyncio.CancelledError) между этапами чтения и разбора
+        basepath:str - путь к файлу *.DATA
+        executor: concurrent.futures.Executor = None - исполнитель для разбора (None - пул потоков по умолчанию,
+            при ProcessPoolExecutor разбор выполняется в отдельном процессе и не блокирует GIL)
+        progress: Callable = None - функция progress(stage: str, done: int, total: int), stage: 'read' - чтение файлов, 'parse' - разбор.
+        Несколько моделей можно загружать одновременно одним парсером (например, asyncio.gather): состояние разбора
+        (путь к модели, кеш файлов) у каждого вызова свое, атрибуты парсера не изменяются'''
+        loop = asyncio.get_running_loop()
+        parser = self.__new_load(basepath)
+        schedule = await asyncio.to_thread(parser.find_schedule_section, basepath)
+        if schedule == None:
+            raise ScheduleNotFoundError
+        await parser.__prefetch_files(schedule['schedule_lines'], progress)
+        if progress != None:
+            progress('parse', 0, 1)
+        model = await loop.run_in_executor(executor, parser.build_model_from_schedule, schedule, basepath)
+        if progress != None:
+            progress('parse', 1, 1)
+        return model
+
+    def __new_load(self, basepath: str) -> 'tNavigatorModelParser':
+        '''Парсер для одной загрузки: настройки (intern_bodies, db_path и др.) копируются,
+        состояние разбора (basepath, кеш файлов, пул тел) - свое, поэтому одновременные загрузки не смешиваются'''
+        parser = copy.copy(self)
+        parser.basepath = normpath(basepath)
+        parser.duplicate_links = []
+        parser.files = {}
+        parser.__body_pool = None
+        return parser
+
+    @staticmethod
+    def __find_includes(lines: List[str]) -> List[str]:
+        '''Значения всех INCLUDE в строках файла'''
+        result = []
+        find_include = False
+        for line in lines:
+            if re.match(r"(?i)^\s*INCLUDE", line):
+                find_include = True
+            if find_include and tnav.re_compiled['INCLUDE'].match(line):
+                result.append(tnav.re_compiled['INCLUDE'].search(line).group('path'))
+                find_include = False
+        return result
+
+    async def __prefetch_files(self, schedule_lines: List[str], progress: Callable = None):
+        '''Параллельное чтение всех файлов модели (INCLUDE любой вложенности и файлы USER) в кеш self.files.
+        Пути вычисляются так же, как в __iter_keywords'''
+        done = 0
+        total = 0
+        async def read(path):
+            nonlocal done
+            self.files[path] = await tNavigatorModelParser.read_lines_async(path)
+            done += 1
+            if progress != None:
+                progress('read', done, total)
+
+        basedir = dirname(self.basepath)
+        modelname = splitext(basename(self.basepath))[0]
+        userpath = join(basedir, 'USER')
+        level = [(self.basepath, schedule_lines)]
+        paths = []
+        if exists(userpath):
+            paths = [join(userpath, x) for x in listdir(userpath) if isfile(join(userpath, x)) and x.startswith(f'{modelname}_')]
+        # файлы USER разбираются НЕ рекурсивно, поэтому их INCLUDE не читаются
+        user_files = set(paths)
+        while len(level) > 0 or len(paths) > 0:
+            for abs_path, lines in level:
+                for value in tNavigatorModelParser.__find_includes(lines):
+                    inc_path_base = normpath(join(basedir, value))
+                    inc_path_curdir = normpath(join(dirname(abs_path), value))
+                    inc_file = inc_path_curdir if exists(inc_path_curdir) else inc_path_base
+                    if inc_file not in self.files and inc_file not in paths:
+                        paths.append(inc_file)
+            total += len(paths)
+            await asyncio.gather(*[read(x) for x in paths])
+            level = [(x, self.files[x]) for x in paths if x not in user_files]
+            paths = []
     
-    def __get_keywords_list(self, lines: List[str], path: str, abs_path:str, keywords_list: list, index: int = 0, use_recursion:bool = True) -> List[tNavigatorKeyword]:
-        '''Получает список ключевых слов. При use_recursion = True Рекурсивно вызывается для секций INCLUDE
+    def __get_lines(self, path: str) -> List[str]:
+        '''Строки файла из кеша self.files (при отсутствии файл читается). При интернировании строки заменяются экземплярами из пула.
+        Для модели SQLite строки не кешируются: ключевые слова сразу записываются в базу'''
+        if self.db_path != None:
+            lines = self.files.pop(path, None)
+            return lines if lines != None else tNavigatorModelParser.read_lines(path)
+        if path not in self.files:
+            self.files[path] = tNavigatorModelParser.read_lines(path)
+        if self.__body_pool is not None:
+            self.files[path] = self.__body_pool.intern_lines(self.files[path])
+        return self.files[path]
+
+    def __iter_keywords(self, lines: List[str], path: str, abs_path: str, use_recursion: bool = True) -> Iterator[tNavigatorKeyword]:
+        '''Ключевые слова строк lines по порядку. При use_recursion = True сразу после каждого INCLUDE 
+        возвращаются ключевые слова включаемого файла (рекурсивно)
         lines: list - список строк, которые парсятся
         path: str - относительный пусть файлу, из которого эти строки ('' -  для первого файла)
-        keywords_list: list of tNavigatorKeyword - список объектов ключевых слов'''
-        if keywords_list == None:
-            keywords_list = []
+        abs_path: str - путь к файлу, из которого эти строки'''
         tNav_kw = None
         for line in lines:
-            re_kw = re.search(tnav.re_pattern['keyword'], line)
+            re_kw = tnav.re_compiled['keyword'].search(line)
             if re_kw:
                 kw = re_kw.group('keyword').upper()
                 if kw in tnav.keywords:
+                    # предыдущее ключевое слово закончилось
+                    if tNav_kw != None:
+                        yield from self.__complete_keyword(tNav_kw, abs_path, use_recursion)
                     tNav_kw_class = tNavigatorModel.get_keyword_class(kw)
                     tNav_kw = tNav_kw_class(kw, path)
-                    # keywords_list.append(tNav_kw)
-                    keywords_list.insert(index, tNav_kw)
-                    index += 1 
             if tNav_kw != None:
                 tNav_kw.add_line(line)
+        if tNav_kw != None:
+            yield from self.__complete_keyword(tNav_kw, abs_path, use_recursion)
 
-        # проходим по всем инклюдам и рекурсивно выполняем те же действия       
-        if use_recursion:
-            inc_list = [x for x in keywords_list if x.name == 'INCLUDE' and x.include_path == path]
-            for inc in inc_list:
-                index = keywords_list.index(inc)
-                value = inc.get_value()
-                if value != None:
-                    inc_path_base = normpath(join(dirname(self.basepath), value))
-                    inc_path_curdir = normpath(join(dirname(abs_path), value))
-                    inc_file = inc_path_curdir if exists(inc_path_curdir) else inc_path_base
-                    if inc_file not in self.files:
-                        lines = tNavigatorModelParser.read_lines(inc_file)
-                        self.files[inc_file]=lines
-                    else:
-                        lines = self.files[inc_file]
-                    self.__get_keywords_list(lines, value, inc_file, keywords_list, index+1)
+    def __complete_keyword(self, keyword: tNavigatorKeyword, abs_path: str, use_recursion: bool) -> Iterator[tNavigatorKeyword]:
+        '''Разобранное ключевое слово, а для INCLUDE (при use_recursion = True) - и ключевые слова включаемого файла'''
+        yield keyword
+        if use_recursion and keyword.name == 'INCLUDE':
+            value = keyword.get_value()
+            if value != None:
+                inc_path_base = normpath(join(dirname(self.basepath), value))
+                inc_path_curdir = normpath(join(dirname(abs_path), value))
+                inc_file = inc_path_curdir if exists(inc_path_curdir) else inc_path_base
+                lines = self.__get_lines(inc_file)
+                yield from self.__iter_keywords(lines, value, inc_file)
 
-    def parse_schedule_section(self, schedule_lines: List[str]) -> List[tNavigatorKeyword]:
-        '''Парсинг SCHEDULE секции. Возвращает список объектов ключевых слов lisf of tNavigatorKeyword'''
-        keywords_list = []
-        self.files[self.basepath] = schedule_lines
-        self.__get_keywords_list(schedule_lines, '/', self.basepath, keywords_list, use_recursion=True)
+    def iter_schedule_section(self, schedule_lines: List[str]) -> Iterator[tNavigatorKeyword]:
+        '''Парсинг SCHEDULE секции по мере чтения. Возвращает итератор объектов ключевых слов tNavigatorKeyword
+        (порядок совпадает с parse_schedule_section)'''
         basedir = dirname(self.basepath)
         modelname = splitext(basename(self.basepath))[0]
         userpath = join(basedir, 'USER')
+        user_files = []
         if exists(userpath):            
             for item in listdir(userpath):
                 userfile = join(userpath, item)
                 if isfile(userfile) and item.startswith(f'{modelname}_'): 
-                    if userfile not in self.files:
-                        lines = tNavigatorModelParser.read_lines(userfile)
-                        self.files = lines
-                    else:
-                        lines = self.files[userfile]
-                    # парсим ТОЛЬКО файл пользователя (НЕ рекурсивно), подразумевая, что там нет INCLUDE
-                    self.__get_keywords_list(lines, relpath(userfile, basedir), userfile, keywords_list, use_recursion=False)   
-        return keywords_list
-    
+                    user_files.append(userfile)
+        # ключевые слова файлов пользователя идут в начале модели (файлы - в обратном порядке)
+        for userfile in reversed(user_files):
+            lines = self.__get_lines(userfile)
+            # парсим ТОЛЬКО файл пользователя (НЕ рекурсивно), подразумевая, что там нет INCLUDE
+            yield from self.__iter_keywords(lines, relpath(userfile, basedir), userfile, use_recursion=False)
+        self.files[self.basepath] = schedule_lines
+        schedule_lines = self.__get_lines(self.basepath)
+        yield from self.__iter_keywords(schedule_lines, '/', self.basepath, use_recursion=True)
+
+    def parse_schedule_section(self, schedule_lines: List[str]) -> List[tNavigatorKeyword]:
+        '''Парсинг SCHEDULE секции. Возвращает список объектов ключевых слов lisf of tNavigatorKeyword'''
+        return list(self.iter_schedule_section(schedule_lines))
    
     def get_keywords_list(self, path: str) -> List[tNavigatorKeyword]:
         '''Получает список ключевых слов из файла
         paht:str - путь к файлу из которого необходимо получить ключевые слова'''
         lines =  tNavigatorModelParser.read_lines(path)
-        keywords_list = []
-        self.__get_keywords_list(lines, '', self.basepath, keywords_list, use_recursion=False)
-        return keywords_list
+        return list(self.__iter_keywords(lines, '', self.basepath, use_recursion=False))
 
 if __name__ == '__main__':
     print(tNavigatorModelParser.__doc__)
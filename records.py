@@ -0,0 +1,107 @@
+import re
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+from . import tnavconstants as tnav
+from .keywords import tNavigatorKeyword
+
+__version__ = '0.1'
+
+# один проход по тексту: строка в кавычках | конец записи | N*значение (N* - N значений по умолчанию) | простое значение
+re_token = re.compile(r"'(?P<quoted>[^']*)'|(?P<slash>/)|(?P<n>\d+)\*(?P<value>'[^']*'|[^\s/']*)|(?P<token>[^\s/']+)")
+
+class _Quoted(str):
+    '''Значение в кавычках: всегда строка, даже если похоже на число (например, имя скважины '0012')'''
+    __slots__ = ()
+
+def tokenize_records(text: str) -> List[List[str]]:
+    '''Разбить текст значений ключевого слова (get_body_value_text()) на записи.
+    N* раскрывается в N значений по умолчанию (None), N*x - в N значений x. Пустая запись (одиночный /) завершает ключевое слово.
+    Значения в кавычках возвращаются как строки, помеченные как текстовые (колонка с ними не преобразуется в числа)
+    text: str - текст значений БЕЗ ключевого слова и комментариев'''
+    records = []
+    record = []
+    for m in re_token.finditer(text):
+        if m.lastgroup == 'slash':
+            if len(record) == 0:
+                break
+            records.append(record)
+            record = []
+        elif m.group('n') != None:
+            value = m.group('value')
+            if value == '':
+                value = None
+            elif value.startswith("'"):
+                value = _Quoted(value[1:-1])
+            record += [value] * int(m.group('n'))
+        elif m.group('quoted') != None:
+            record.append(_Quoted(m.group('quoted')))
+        else:
+            record.append(m.group('token'))
+    if len(record) > 0:
+        records.append(record)
+    return records
+
+class RecordTable(object):
+    '''Класс RecordTable: записи ключевых слов в виде типизированных колонок numpy.
+    Числовые колонки - float64 (значение по умолчанию - NaN), остальные - object (значение по умолчанию - None).
+    Колонка, в которой есть значения в кавычках, всегда текстовая
+    columns: Dict[str, np.ndarray] - колонки
+    defaults: np.ndarray - маска значений по умолчанию (кол-во записей x кол-во колонок)
+    keyword_index: np.ndarray - номер ключевого слова, из которого получена запись (для пакетного разбора)'''
+    def __init__(self, columns: Dict[str, np.ndarray], defaults: np.ndarray, keyword_index: np.ndarray) -> None:
+        self.columns = columns
+        self.defaults = defaults
+        self.keyword_index = keyword_index
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def __len__(self) -> int:
+        return len(self.keyword_index)
+
+    def to_dataframe(self) -> pd.DataFrame:
+        '''Конвертировать записи в pandas.DataFrame'''
+        return pd.DataFrame(self.columns)
+
+def _to_column(values: List[str]) -> np.ndarray:
+    if any(isinstance(x, _Quoted) for x in values):
+        return np.array([None if x is None else str(x) for x in values], dtype=object)
+    try:
+        return np.array(['nan' if x is None else x for x in values], dtype=np.float64)
+    except ValueError:
+        return np.array(values, dtype=object)
+
+def parse_records(keywords: Iterable[tNavigatorKeyword], columns: List[str] = None) -> RecordTable:
+    '''Пакетный разбор записей нескольких ключевых слов в колонки numpy
+    keywords: Iterable[tNavigatorKeyword] - ключевые слова (обычно одного типа, например find_keywords(keyword='COMPDAT'))
+    columns: List[str] = None - имена колонок. По умолчанию берутся из tnav.record_columns по имени первого ключевого слова,
+        лишние значения записей получают имена c<номер>'''
+    records = []
+    index = []
+    name = None
+    for i, kw in enumerate(keywords):
+        name = kw.name if name == None else name
+        kw_records = tokenize_records(kw.get_body_value_text())
+        records += kw_records
+        index += [i] * len(kw_records)
+    if columns == None:
+        columns = tnav.record_columns.get(name, [])
+    ncols = max([len(columns)] + [len(x) for x in records])
+    columns = list(columns) + [f'c{i}' for i in range(len(columns), ncols)]
+    # выравниваем записи до одинаковой длины (недостающие значения - по умолчанию) и транспонируем в колонки
+    matrix = [x + [None] * (ncols - len(x)) for x in records]
+    data = list(zip(*matrix)) if len(matrix) > 0 else [()] * ncols
+    defaults = np.array([[x is None for x in row] for row in matrix], dtype=bool).reshape(len(matrix), ncols)
+    return RecordTable({columns[j]: _to_column(list(data[j])) for j in range(ncols)}, defaults, np.array(index, dtype=np.int64))
+
+def get_records(keyword: tNavigatorKeyword, columns: List[str] = None) -> RecordTable:
+    '''Разбор записей одного ключевого слова в колонки numpy
+    keyword: tNavigatorKeyword - ключевое слово
+    columns: List[str] = None - имена колонок (по умолчанию из tnav.record_columns)'''
+    return parse_records([keyword], columns)
+
+if __name__ == '__main__':
+    print(RecordTable.__doc__)
@@ -0,0 +1,139 @@
+from concurrent.futures import ProcessPoolExecutor
+from hashlib import blake2b
+from os.path import exists, join, normpath, splitext
+from typing import Callable, Dict, Iterable, List, Union
+
+import networkx as nx
+import pandas as pd
+
+from .model import tNavigatorModel
+from .serialization import dumps, loads
+
+__version__ = '0.1'
+
+# базовая модель (serialization.dumps) и ее файлы в процессе-обработчике (передаются один раз при инициализации процесса)
+_base_data = None
+_base_files = None
+
+def _get_files(data) -> Dict[str, List[str]]:
+    files = {} # {имя файла: содержание файла}
+    for date, keywords in sorted(data.items()):
+        for kw in keywords:
+            if kw.include_path not in files:
+                files[kw.include_path] = []
+            files[kw.include_path] += kw.body
+    return files
+
+def _content_name(path: str, content: List[str]) -> str:
+    '''Имя файла по содержимому: <имя>_<хеш содержимого><расширение>'''
+    digest = blake2b(''.join(content).encode('utf-8'), digest_size=8).hexdigest()
+    f = splitext(path)
+    return f'{f[0]}_{digest}{f[1]}'
+
+def _init_worker(data: bytes):
+    global _base_data, _base_files
+    # в процессы модель передается в компактном двоичном формате (serialization.dumps)
+    _base_data = data
+    _base_files = _get_files(loads(data).schedule_data)
+
+def _build_variant(name: str, edits: Union[Callable, Iterable[Callable]]) -> dict:
+    '''Построить вариант модели в процессе-обработчике (базовая модель задается _init_worker)'''
+    return _build(_base_data, _base_files, name, edits)
+
+def _build(base_data: bytes, base_files: Dict[str, List[str]], name: str, edits: Union[Callable, Iterable[Callable]]) -> dict:
+    '''Построить вариант модели: применить правки к копии базовой модели и получить содержимое файлов.
+    Копия восстанавливается из сериализованной модели (loads), что дешевле copy.deepcopy.
+    Измененные файлы (и файлы, ссылающиеся на них) получают имена по содержимому, поэтому одинаковые файлы разных вариантов совпадают'''
+    variant = loads(base_data)
+    for edit in ([edits] if callable(edits) else edits):
+        edit(variant)
+    files = _get_files(variant.schedule_data)
+    graph = variant.build_include_graph()
+    graph.add_nodes_from(files)
+    includes = {} # {исходный файл: файл варианта}
+    user_files = {}
+    # обходим граф от вложенных файлов к корневому, чтобы имена дочерних файлов были известны до хеширования родителя
+    for path in reversed(list(nx.topological_sort(graph))):
+        if path == '/' or path not in files or path in variant.immutable_files:
+            continue
+        if path.upper().startswith('USER'):
+            user_files[path.replace(variant.model_name, name)] = files[path]
+            continue
+        inc_kw = [x for x in variant.find_keywords(keyword='INCLUDE') if x.include_path == path and x.get_value() in includes]
+        for kw in inc_kw:
+            kw.set_value(includes[kw.get_value()])
+        if len(inc_kw) > 0:
+            files[path] = _get_files({None: [x for x in variant.find_keywords() if x.include_path == path]})[path]
+        if files[path] != base_files.get(path):
+            includes[path] = _content_name(path, files[path])
+    for kw in variant.find_keywords(keyword='INCLUDE'):
+        if kw.include_path == '/' and kw.get_value() in includes:
+            kw.set_value(includes[kw.get_value()])
+    root = _get_files(variant.schedule_data).get('/', [])
+    return {'name': name,
+            'data': variant.build_data_file(root),
+            'files': {includes[x]: files[x] for x in includes},
+            'includes': includes,
+            'user_files': user_files}
+
+class tNavigatorScenarioGenerator(object):
+    '''Класс tNavigatorScenarioGenerator: пакетная генерация вариантов модели из одной базовой модели.
+    Варианты строятся в пуле процессов, измененные файлы сохраняются под именами по содержимому,
+    поэтому одинаковый файл разных вариантов записывается на диск один раз
+    model: tNavigatorModel - базовая модель (должна быть построена из файла, см. tNavigatorModelParser.build_model)'''
+    def __init__(self, model: tNavigatorModel) -> None:
+        if model.model_name == None:
+            raise ValueError('Базовая модель должна быть построена из файла')
+        self.model = model
+
+    def generate(self, edit_sets: List[Union[Callable, Iterable[Callable]]], names: List[str] = None, processes: int = None) -> pd.DataFrame:
+        '''Сгенерировать и сохранить варианты модели. Возвращает pandas.DataFrame ['scenario', 'source', 'file', 'written']
+        edit_sets: list - набор правок для каждого варианта: функция f(model) или список таких функций.
+            Для пула процессов функции должны быть определены на уровне модуля (передаются через pickle)
+        names: List[str] = None - имена вариантов (БЕЗ РАСШИРЕНИЯ), по умолчанию <имя модели>-<номер>.
+            Имена не должны начинаться с <имя модели>_, иначе файлы USER варианта будут считаны в базовую модель
+        processes: int = None - кол-во процессов (None - по кол-ву ядер, 0 - без пула, в текущем процессе)'''
+        model_name = self.model.model_name
+        if names == None:
+            names = [f'{model_name}-{i+1}' for i in range(len(edit_sets))]
+        if len(names) != len(edit_sets):
+            raise ValueError('Кол-во имен вариантов должно совпадать с кол-вом наборов правок')
+        if model_name in names or len(set(names)) != len(names):
+            raise ValueError('Имена вариантов должны быть уникальными и не совпадать с именем базовой модели')
+        # файлы USER/<имя модели>_* считываются парсером в базовую модель
+        wrong = [x for x in names if x.startswith(f'{model_name}_')]
+        if len(wrong) > 0:
+            raise ValueError(f'Имена вариантов не должны начинаться с {model_name}_: {wrong}')
+        data = dumps(self.model)
+        if processes == 0:
+            files = _get_files(self.model.schedule_data)
+            results = (_build(data, files, name, edits) for name, edits in zip(names, edit_sets))
+            return self.__save(results)
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(data,)) as pool:
+            return self.__save(pool.map(_build_variant, names, edit_sets))
+
+    def __write(self, path: str, content: List[str]):
+        with open(normpath(join(self.model.model_dirname, path)), 'w', encoding='utf-8') as f:
+            f.writelines(content)
+
+    def __save(self, results) -> pd.DataFrame:
+        '''Запись результатов по мере их готовности. Файл с именем по содержимому записывается, только если его еще нет'''
+        report = []
+        written = set()
+        for result in results:
+            for source, path in result['includes'].items():
+                is_new = path not in written and not exists(normpath(join(self.model.model_dirname, path)))
+                if is_new:
+                    self.__write(path, result['files'][path])
+                written.add(path)
+                report.append({'scenario': result['name'], 'source': source, 'file': path, 'written': is_new})
+            for path, content in result['user_files'].items():
+                self.__write(path, content)
+                report.append({'scenario': result['name'], 'source': path, 'file': path, 'written': True})
+            data_file = result['name'] + '.DATA'
+            self.__write(data_file, result['data'])
+            report.append({'scenario': result['name'], 'source': '/', 'file': data_file, 'written': True})
+        return pd.DataFrame(report, columns=['scenario', 'source', 'file', 'written'])
+
+if __name__ == '__main__':
+    print(tNavigatorScenarioGenerator.__doc__)
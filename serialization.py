@@ -0,0 +1,202 @@
+import json
+import mmap
+import struct
+from datetime import datetime
+from io import BytesIO
+from typing import Dict, List
+
+import numpy as np
+
+from .keywords import *
+from .model import tNavigatorModel
+
+__version__ = '0.1'
+
+MAGIC = b'SCHV'
+FORMAT_VERSION = 1
+# заголовок: сигнатура, версия формата, смещение и длина метаданных (JSON в конце файла)
+HEADER = struct.Struct('<4sIQQ')
+
+# колонки таблицы ключевых слов (одна строка на ключевое слово)
+KEYWORD_DTYPE = np.dtype([('date', '<i4'), ('name', '<i4'), ('path', '<i4'), ('immutable', 'u1'), ('offset', '<i8'), ('length', '<i8')])
+
+class _MappedBody(object):
+    '''Тело ключевого слова в буфере сериализованной модели (bytes или отображенный в память файл).
+    Строки декодируются при первом обращении. Тело неизменяемое и разделяется ключевыми словами с одинаковым текстом
+    (как интернированное tuple-тело), при изменении ключевого слова заменяется списком строк'''
+    __slots__ = ('__buffer', '__start', '__stop', '__lines')
+
+    def __init__(self, buffer, start: int, stop: int) -> None:
+        self.__buffer = buffer
+        self.__start = start
+        self.__stop = stop
+        self.__lines = None
+
+    @property
+    def lines(self) -> tuple:
+        if self.__lines is None:
+            self.__lines = tuple(bytes(self.__buffer[self.__start:self.__stop]).decode('utf-8').splitlines(keepends=True))
+            # после декодирования буфер не нужен (отображение файла закрывается, когда декодированы все тела)
+            self.__buffer = None
+        return self.__lines
+
+    def __iter__(self):
+        return iter(self.lines)
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    def __getitem__(self, index):
+        return self.lines[index]
+
+    def __reduce__(self):
+        # при pickle/deepcopy передаются строки, а не буфер
+        return (tuple, (self.lines,))
+
+    def __repr__(self) -> str:
+        return repr(self.lines)
+
+class _Packer(object):
+    '''Упаковка ключевых слов в таблицы строк и общий блок текста (одинаковые тела хранятся один раз)'''
+    def __init__(self) -> None:
+        self.names = {}
+        self.paths = {}
+        self.bodies = {}
+        self.blob = bytearray()
+
+    @staticmethod
+    def __index(table: Dict[str, int], value: str) -> int:
+        return table.setdefault(value, len(table))
+
+    def pack(self, data: Dict[datetime, List[tNavigatorKeyword]]) -> tuple:
+        dates = sorted(data)
+        table = np.empty(sum(len(data[x]) for x in dates), dtype=KEYWORD_DTYPE)
+        i = 0
+        for d, date in enumerate(dates):
+            for kw in data[date]:
+                text = kw.get_body_text()
+                if text not in self.bodies:
+                    raw = text.encode('utf-8')
+                    self.bodies[text] = (len(self.blob), len(raw))
+                    self.blob += raw
+                offset, length = self.bodies[text]
+                table[i] = (d, _Packer.__index(self.names, kw.name), _Packer.__index(self.paths, kw.include_path), kw.immutable, offset, length)
+                i += 1
+        return np.array(dates, dtype='datetime64[us]').astype('<i8'), table
+
+def _pack_model(model: tNavigatorModel) -> tuple:
+    packer = _Packer()
+    dates, table = packer.pack(model.schedule_data)
+    source_dates, source_table = packer.pack(model.source_sch)
+    meta = {'version': FORMAT_VERSION,
+            'start': model.start.isoformat() if model.start != None else None,
+            'basepath': model.basepath,
+            'schedule_path': model.schedule_path,
+            'immutable_files': model.immutable_files,
+            'schedule_kw': [model.schedule_kw.name, model.schedule_kw.include_path, model.schedule_kw.get_body_text()],
+            'end_kw': [model.end_kw.name, model.end_kw.include_path, model.end_kw.get_body_text()],
+            'interned': model.body_pool is not None,
+            'names': list(packer.names),
+            'paths': list(packer.paths)}
+    arrays = [('dates', dates), ('keywords', table), ('source_dates', source_dates), ('source_keywords', source_table)]
+    return meta, arrays, packer.blob
+
+def _write(stream, model: tNavigatorModel):
+    meta, arrays, blob = _pack_model(model)
+    stream.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, 0))
+    position = HEADER.size
+    meta['arrays'] = {}
+    for name, array in arrays:
+        data = array.tobytes()
+        meta['arrays'][name] = [position, len(array)]
+        stream.write(data)
+        position += len(data)
+    meta['blob'] = [position, len(blob)]
+    stream.write(blob)
+    position += len(blob)
+    raw = json.dumps(meta, ensure_ascii=False).encode('utf-8')
+    stream.write(raw)
+    return HEADER.pack(MAGIC, FORMAT_VERSION, position, len(raw))
+
+def dumps(model: tNavigatorModel) -> bytes:
+    '''Сериализовать модель в компактный двоичный формат (например, для передачи в пул процессов)
+    model: tNavigatorModel - модель'''
+    stream = BytesIO()
+    header = _write(stream, model)
+    buffer = stream.getbuffer()
+    buffer[:HEADER.size] = header
+    return bytes(buffer)
+
+def save_model(model: tNavigatorModel, path: str):
+    '''Сохранить модель в файл компактного двоичного формата:
+    таблицы строк (ключевые слова, пути к файлам), таблица ключевых слов (numpy), индекс дат и общий блок текста ключевых слов
+    model: tNavigatorModel - модель
+    path: str - путь к файлу'''
+    with open(path, 'wb') as f:
+        header = _write(f, model)
+        f.seek(0)
+        f.write(header)
+
+def _unpack(buffer, meta: dict, dates_name: str, table_name: str) -> Dict[datetime, List[tNavigatorKeyword]]:
+    offset, count = meta['arrays'][dates_name]
+    dates = np.frombuffer(buffer, dtype='<i8', count=count, offset=offset).astype('datetime64[us]').astype(datetime)
+    offset, count = meta['arrays'][table_name]
+    table = np.frombuffer(buffer, dtype=KEYWORD_DTYPE, count=count, offset=offset)
+    blob_offset = meta['blob'][0]
+    names = meta['names']
+    paths = meta['paths']
+    classes = [registry.get_class(x) for x in names]
+    # тела не декодируются при загрузке: ключевые слова ссылаются на участки общего блока текста
+    bodies = {}
+    data = {x: [] for x in dates}
+    for d, n, p, immutable, body_offset, length in table.tolist():
+        body = bodies.get(body_offset)
+        if body is None:
+            start = blob_offset + body_offset
+            body = bodies[body_offset] = _MappedBody(buffer, start, start + length)
+        kw = tNavigatorKeyword(names[n], paths[p])
+        kw.__class__ = classes[n]
+        kw.body = body
+        kw.immutable = bool(immutable)
+        data[dates[d]].append(kw)
+    return data
+
+def _read(buffer) -> tNavigatorModel:
+    magic, version, meta_offset, meta_length = HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise ValueError('Неверный формат файла модели')
+    if version > FORMAT_VERSION:
+        raise ValueError(f'Версия формата {version} не поддерживается')
+    meta = json.loads(bytes(buffer[meta_offset:meta_offset+meta_length]).decode('utf-8'))
+    body_pool = KeywordBodyPool() if meta['interned'] else None
+    start = datetime.fromisoformat(meta['start']) if meta['start'] != None else None
+    source_sch = _unpack(buffer, meta, 'source_dates', 'source_keywords')
+    model = tNavigatorModel(start, [], meta['basepath'], meta['schedule_path'], body_pool=body_pool, source_sch=source_sch)
+    model.schedule_data = _unpack(buffer, meta, 'dates', 'keywords')
+    model.immutable_files = meta['immutable_files']
+    for attr in ('schedule_kw', 'end_kw'):
+        name, path, text = meta[attr]
+        kw = tNavigatorKeyword(name, path)
+        kw.set_body_text(text)
+        setattr(model, attr, kw)
+    return model
+
+def loads(data: bytes) -> tNavigatorModel:
+    '''Восстановить модель из байтов, полученных dumps. Тела ключевых слов декодируются из data при первом обращении
+    data: bytes - сериализованная модель'''
+    return _read(memoryview(data))
+
+def load_model(path: str, use_mmap: bool = True) -> tNavigatorModel:
+    '''Загрузить модель из файла, сохраненного save_model (без повторного разбора файлов модели).
+    Тела ключевых слов декодируются при первом обращении к ним
+    path: str - путь к файлу
+    use_mmap: bool = True - отображать файл в память (mmap) вместо чтения целиком. Отображение остается открытым,
+        пока в модели есть недекодированные тела ключевых слов: файл нельзя изменять, пока модель используется'''
+    with open(path, 'rb') as f:
+        if not use_mmap:
+            return _read(memoryview(f.read()))
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return _read(memoryview(mm))
+
+if __name__ == '__main__':
+    print(save_model.__doc__)
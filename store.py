@@ -0,0 +1,465 @@
+import asyncio
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from functools import wraps
+from hashlib import blake2b
+from itertools import chain
+from typing import Dict, Iterable, List
+
+import pandas as pd
+
+from .keywords import *
+from .model import tNavigatorModel
+from .timeline import tNavigatorTimeline
+from .views import tNavigatorModelView
+
+__version__ = '0.1'
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS keywords (id INTEGER PRIMARY KEY, date TEXT NOT NULL, pos INTEGER NOT NULL, name TEXT NOT NULL,
+    comment TEXT, include_path TEXT NOT NULL, value TEXT, immutable INTEGER NOT NULL DEFAULT 0, body TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS keywords_date ON keywords (date, pos);
+CREATE INDEX IF NOT EXISTS keywords_name ON keywords (name, date);
+CREATE INDEX IF NOT EXISTS keywords_comment ON keywords (comment);
+CREATE INDEX IF NOT EXISTS keywords_include ON keywords (include_path, date, pos);
+CREATE INDEX IF NOT EXISTS keywords_value ON keywords (name, value);
+CREATE TABLE IF NOT EXISTS source_keywords (id INTEGER PRIMARY KEY, date TEXT NOT NULL, pos INTEGER NOT NULL, name TEXT NOT NULL,
+    comment TEXT, include_path TEXT NOT NULL, value TEXT, immutable INTEGER NOT NULL DEFAULT 0, body TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS source_keywords_include ON source_keywords (include_path, date, pos);
+'''
+
+COLUMNS = 'id, date, name, include_path, immutable, body'
+
+def _date_to_str(date: datetime) -> str:
+    # ISO-формат сохраняет порядок дат при сравнении строк
+    return date.isoformat(timespec='microseconds')
+
+def _str_to_date(text: str) -> datetime:
+    return datetime.fromisoformat(text)
+
+def _locked(method):
+    # соединение общее для всех потоков, поэтому запросы к базе выполняются по очереди
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+class tNavigatorSqliteModel(tNavigatorModel):
+    '''Класс tNavigatorSqliteModel(tNavigatorModel): модель, ключевые слова которой хранятся в локальной базе SQLite.
+    find_keywords, add_keyword, delete_keywords выполняются запросами по индексам (дата, ключевое слово, комментарий, файл),
+    тела ключевых слов загружаются только для найденных записей.
+    Ключевые слова, возвращаемые find_keywords и view, - отдельные объекты: после изменения их нужно сохранить через update_keyword.
+    Без загрузки всей модели в память выполняются: построение модели парсером (ключевые слова записываются в базу по мере разбора),
+    find_keywords, count_keywords, find_by_include, add_keyword, update_keyword, delete_keywords, truncate, timeline, dates,
+    view (запрос по интервалу дат), get_changed_files (файлы сравниваются по хешам, загружаются только измененные)
+    и save_as (загружаются только измененные файлы и файлы с INCLUDE).
+    Загружают модель в память ЦЕЛИКОМ: schedule_data, source_sch, to_model(), validate и save_as(validate=True), diff, body_stats,
+    intern_bodies, to_dataframe, export_to_excel, shift_dates, splice.
+    Соединение с базой открывается при первом обращении и может использоваться из любого потока (запросы выполняются под блокировкой).
+    При передаче модели в другой процесс (pickle) соединение не передается и открывается заново по db_path
+    db_path: str - путь к файлу базы. Если keywords_list не пуст, база перезаписывается, иначе открывается сохраненная модель
+    keywords_list: Iterable - ключевые слова (список или итератор, например tNavigatorModelParser.iter_schedule_section)
+    start, basepath, schedule_path - см. tNavigatorModel'''
+    def __init__(self, db_path: str, start: datetime = None, keywords_list: Iterable[tNavigatorKeyword] = [], basepath: str = None, schedule_path: str = None) -> None:
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self.__connection = None
+        self.__ready = False
+        keywords = iter(keywords_list)
+        first = next(keywords, None)
+        reopen = first is None and self.__has_model()
+        if not reopen:
+            self.connection.executescript('DROP TABLE IF EXISTS meta; DROP TABLE IF EXISTS keywords; DROP TABLE IF EXISTS source_keywords;')
+        self.connection.executescript(SCHEMA)
+        if reopen:
+            meta = self.__get_meta()
+            start = _str_to_date(meta['start']) if meta.get('start') else None
+            basepath = meta.get('basepath')
+            schedule_path = meta.get('schedule_path')
+        super().__init__(start, [], basepath, schedule_path, source_sch={})
+        self.__ready = True
+        if reopen:
+            self.immutable_files = json.loads(meta.get('immutable_files', '{}'))
+            self.schedule_kw.set_body_text(meta.get('schedule_kw', 'SCHEDULE\n'))
+            self.end_kw.set_body_text(meta.get('end_kw', 'END\n'))
+        else:
+            date = start
+            for kw in (chain([first], keywords) if first is not None else []):
+                if kw.name == 'SCHEDULE':
+                    self.schedule_kw = kw
+                elif kw.name == 'END':
+                    self.end_kw = kw
+                else:
+                    if kw.name == 'DATES':
+                        date = kw.get_value()
+                    if kw.name == 'TSTEP':
+                        date = date + kw.get_value()
+                    self.__add_keyword(date, kw, add_date_kw=False)
+            self.connection.execute('INSERT INTO source_keywords SELECT * FROM keywords')
+            self.__save_meta()
+            self.connection.commit()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        '''Соединение с базой (открывается при первом обращении)'''
+        with self._lock:
+            if self.__connection is None:
+                self.__connection = sqlite3.connect(self.db_path, check_same_thread=False)
+            return self.__connection
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state['_tNavigatorSqliteModel__connection'] = None
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+    def __has_model(self) -> bool:
+        return self.connection.execute("SELECT count(*) FROM sqlite_master WHERE type='table' AND name='meta'").fetchone()[0] > 0
+
+    def __get_meta(self) -> Dict[str, str]:
+        return dict(self.connection.execute('SELECT key, value FROM meta').fetchall())
+
+    def __save_meta(self):
+        meta = {'start': _date_to_str(self.start) if self.start != None else '',
+                'basepath': self.basepath,
+                'schedule_path': self.schedule_path,
+                'immutable_files': json.dumps(self.immutable_files),
+                'schedule_kw': self.schedule_kw.get_body_text(),
+                'end_kw': self.end_kw.get_body_text()}
+        self.connection.executemany('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', meta.items())
+
+    @staticmethod
+    def __keyword_from_row(row) -> tNavigatorKeyword:
+        id, date, name, include_path, immutable, body = row
+        kw = registry.get_class(name)(name, include_path)
+        kw.body = body.splitlines(keepends=True)
+        kw.immutable = bool(immutable)
+        kw.store_id = id
+        return kw
+
+    @staticmethod
+    def __keyword_values(keyword: tNavigatorKeyword) -> tuple:
+        value = keyword.get_value() if keyword.name == 'INCLUDE' else None
+        return (keyword.name, keyword.get_comment(), keyword.include_path, value, int(keyword.immutable), keyword.get_body_text())
+
+    def __load(self, table: str, start: datetime = None, end: datetime = None, include_paths: Iterable[str] = None) -> Dict[datetime, List[tNavigatorKeyword]]:
+        '''Загрузить ключевые слова таблицы (всей или интервала дат [start, end) и/или файлов include_paths)'''
+        conditions = []
+        params = []
+        if start != None:
+            conditions.append('date >= ?')
+            params.append(_date_to_str(start))
+        if end != None:
+            conditions.append('date < ?')
+            params.append(_date_to_str(end))
+        if include_paths != None:
+            conditions.append('include_path IN (SELECT value FROM json_each(?))')
+            params.append(json.dumps(list(include_paths)))
+        where = ' WHERE ' + ' AND '.join(conditions) if len(conditions) > 0 else ''
+        data = {}
+        for row in self.connection.execute(f'SELECT {COLUMNS} FROM {table}{where} ORDER BY date, pos', params):
+            data.setdefault(_str_to_date(row[1]), []).append(tNavigatorSqliteModel.__keyword_from_row(row))
+        return data
+
+    @property
+    @_locked
+    def schedule_data(self) -> Dict[datetime, tNavigatorKeyword]:
+        '''Данные SCHEDULE секции, загруженные из базы целиком { datetime : list of tNavigatorKeyword }.
+        Изменения в возвращаемом словаре в базу не попадают, для замены данных используйте присваивание'''
+        if not self.__ready:
+            return {}
+        return self.__load('keywords')
+
+    @schedule_data.setter
+    @_locked
+    def schedule_data(self, sch_data):
+        '''Заменить данные SCHEDULE секции в базе'''
+        self.connection.execute('DELETE FROM keywords')
+        rows = []
+        for date, keywords in sch_data.items():
+            for pos, kw in enumerate(keywords):
+                rows.append((_date_to_str(date), pos, *tNavigatorSqliteModel.__keyword_values(kw)))
+        self.connection.executemany('INSERT INTO keywords (date, pos, name, comment, include_path, value, immutable, body) VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+        self.connection.commit()
+
+    @property
+    @_locked
+    def source_sch(self) -> Dict[datetime, tNavigatorKeyword]:
+        '''Исходные данные SCHEDULE секции (неизмененная версия), загруженные из базы целиком'''
+        return self.__load('source_keywords') if self.__ready else {}
+
+    @property
+    @_locked
+    def timeline(self) -> tNavigatorTimeline:
+        '''Временная шкала модели (строится по индексу дат без загрузки ключевых слов)'''
+        rows = self.connection.execute('SELECT date, count(*) FROM keywords GROUP BY date ORDER BY date').fetchall()
+        return tNavigatorTimeline.from_counts([_str_to_date(x[0]) for x in rows], [x[1] for x in rows])
+
+    @_locked
+    def dates(self) -> List[datetime]:
+        '''Даты модели по возрастанию'''
+        return [_str_to_date(x[0]) for x in self.connection.execute('SELECT DISTINCT date FROM keywords ORDER BY date')]
+
+    def __where(self, date: datetime = None, keyword: str = None, comment: str = None):
+        conditions = []
+        params = []
+        for column, value in (('date', _date_to_str(date) if date != None else None), ('name', keyword), ('comment', comment)):
+            if value != None:
+                conditions.append(f'{column} = ?')
+                params.append(value)
+        return (' WHERE ' + ' AND '.join(conditions) if len(conditions) > 0 else ''), params
+
+    @_locked
+    def find_keywords(self, date: datetime = None, keyword: str = None, comment: str = None) -> List[tNavigatorKeyword]:
+        '''Найти ключевые слова по заданным параметрам (вызов без параметров вернет ВСЕ ключевые слова списком)
+        date: datetime = None - дата
+        keyword: str = None - название ключевого слова
+        comment: str = None - коментарий ключевого слова (без --)'''
+        if not self.__ready:
+            return []
+        where, params = self.__where(date, keyword, comment)
+        rows = self.connection.execute(f'SELECT {COLUMNS} FROM keywords{where} ORDER BY date, pos', params)
+        return [tNavigatorSqliteModel.__keyword_from_row(x) for x in rows]
+
+    @_locked
+    def count_keywords(self, date: datetime = None, keyword: str = None, comment: str = None) -> int:
+        '''Кол-во ключевых слов по заданным параметрам (без загрузки ключевых слов)'''
+        where, params = self.__where(date, keyword, comment)
+        return self.connection.execute(f'SELECT count(*) FROM keywords{where}', params).fetchone()[0]
+
+    @_locked
+    def find_by_include(self, include_path: str) -> List[tNavigatorKeyword]:
+        '''Найти ключевые слова, находящиеся в файле include_path'''
+        rows = self.connection.execute(f'SELECT {COLUMNS} FROM keywords WHERE include_path = ? ORDER BY date, pos', (include_path,))
+        return [tNavigatorSqliteModel.__keyword_from_row(x) for x in rows]
+
+    @_locked
+    def add_immutable_file(self, path, has_large_kw: bool=False):
+        if path in self.immutable_files:
+            self.immutable_files[path]=self.immutable_files[path]+1
+        else:
+            self.immutable_files[path]=1 if has_large_kw else 2
+        self.connection.execute('UPDATE keywords SET immutable = 1 WHERE include_path = ?', (path,))
+        self.__save_meta()
+
+    def __last_include_path(self, condition: str, date: datetime) -> str:
+        row = self.connection.execute(f'SELECT include_path FROM keywords WHERE date {condition} ? ORDER BY date DESC, pos DESC LIMIT 1', (_date_to_str(date),)).fetchone()
+        return row[0] if row else ''
+
+    def __insert(self, date: datetime, keyword: tNavigatorKeyword):
+        d = _date_to_str(date)
+        pos = self.connection.execute('SELECT coalesce(max(pos) + 1, 0) FROM keywords WHERE date = ?', (d,)).fetchone()[0]
+        cursor = self.connection.execute('INSERT INTO keywords (date, pos, name, comment, include_path, value, immutable, body) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                                         (d, pos, *tNavigatorSqliteModel.__keyword_values(keyword)))
+        keyword.store_id = cursor.lastrowid
+
+    def __add_keyword(self, date: datetime, keyword: tNavigatorKeyword, add_date_kw: bool = True) -> tNavigatorKeyword:
+        '''Добавление ключевого слова без фиксации транзакции (логика совпадает с tNavigatorModel.add_keyword)'''
+        if date < self.start:
+            raise KeyError (f'Ключевое слово {keyword.name} не может быть добавлено в модель. Дата ключевого слова НЕ должна быть меньше стартовой')
+        keyword.__class__ = registry.get_class(keyword.name)
+        if not keyword.is_correct():
+            raise ValueError (f'Ключевое слово {keyword.name} не может быть добавлено в модель. Проверьте корректность значений')
+        # стартовая дата не требует ключевого слова DATES
+        if date == self.start or self.count_keywords(date) > 0:
+            if keyword.include_path == '':
+                keyword.include_path = self.__last_include_path('=', date)
+            # проверяем втречалось ли INCLUDE с таким путем, если да, то этот файл изменять нельзя
+            if keyword.name == 'INCLUDE':
+                val = keyword.get_value()
+                n = self.connection.execute("SELECT count(*) FROM keywords WHERE name = 'INCLUDE' AND value = ?", (val,)).fetchone()[0]
+                if n > 0:
+                    self.add_immutable_file(val)
+            keyword.immutable = keyword.include_path in self.immutable_files
+            self.__insert(date, keyword)
+        else:
+            if keyword.include_path == '':
+                keyword.include_path = self.__last_include_path('<', date)
+            if add_date_kw and keyword.name != 'DATES':
+                datekw = DATES(include_path=keyword.include_path)
+                datekw.set_value(date)
+                self.__insert(date, datekw)
+            self.__insert(date, keyword)
+        return keyword
+
+    @_locked
+    def add_keyword(self, date: datetime, keyword: tNavigatorKeyword, add_date_kw: bool = True) -> tNavigatorKeyword:
+        '''Добавить ОДНО ключевое слово в модель (см. tNavigatorModel.add_keyword)'''
+        keyword = self.__add_keyword(date, keyword, add_date_kw)
+        self.connection.commit()
+        return keyword
+
+    @_locked
+    def update_keyword(self, keyword: tNavigatorKeyword):
+        '''Сохранить в базу изменения ключевого слова, полученного из find_keywords
+        keyword: tNavigatorKeyword - ключевое слово'''
+        if getattr(keyword, 'store_id', None) == None:
+            raise ValueError(f'Ключевое слово {keyword.name} не найдено в базе')
+        self.connection.execute('UPDATE keywords SET name = ?, comment = ?, include_path = ?, value = ?, immutable = ?, body = ? WHERE id = ?',
+                                (*tNavigatorSqliteModel.__keyword_values(keyword), keyword.store_id))
+        self.connection.commit()
+
+    @_locked
+    def delete_keywords(self, date: datetime, keyword: str = None, comment: str = None) -> List[tNavigatorKeyword]:
+        '''Удалить ключевые слова по заданным параметрам
+        date: datetime - дата
+        keyword: str = None - название ключевого слова
+        comment: str = None - коментарий ключевого слова (без --)'''
+        deleted = self.find_keywords(date, keyword, comment)
+        if keyword != None or comment != None:
+            for item in deleted:
+                if item.immutable:
+                    print(f'Ключевое слово {item} не было удалено, так как находится в файле на который несколько ссылок')
+            deleted = [x for x in deleted if not x.immutable]
+        self.connection.executemany('DELETE FROM keywords WHERE id = ?', [(x.store_id,) for x in deleted])
+        self.connection.commit()
+        return deleted
+
+    @_locked
+    def truncate(self, start: datetime = None, end: datetime = None) -> Dict[datetime, List[tNavigatorKeyword]]:
+        '''Оставить в модели только интервал дат [start, end). Возвращает удаленные данные { datetime: list of tNavigatorKeyword }.
+        Проверки - см. tNavigatorModel.truncate'''
+        if start != None:
+            first = self.connection.execute('SELECT MIN(date) FROM keywords WHERE date >= ?' + (' AND date < ?' if end != None else ''),
+                                            [_date_to_str(start)] + ([_date_to_str(end)] if end != None else [])).fetchone()[0]
+            removed_before = self.connection.execute('SELECT 1 FROM keywords WHERE date < ? LIMIT 1', (_date_to_str(start),)).fetchone()
+            has_dates = self.connection.execute("SELECT 1 FROM keywords WHERE date = ? AND name = 'DATES' LIMIT 1", (first,)).fetchone()
+            if first != None and removed_before != None and has_dates == None:
+                raise ValueError(f'Дата {_str_to_date(first)} задается TSTEP относительно удаляемой даты, интервал не может начинаться с нее')
+        conditions = []
+        params = []
+        if start != None:
+            conditions.append('date < ?')
+            params.append(_date_to_str(start))
+        if end != None:
+            conditions.append('date >= ?')
+            params.append(_date_to_str(end))
+        if len(conditions) == 0:
+            return {}
+        where = ' WHERE ' + ' OR '.join(conditions)
+        row = self.connection.execute(f'SELECT {COLUMNS} FROM keywords WHERE ({" OR ".join(conditions)}) AND immutable = 1 LIMIT 1', params).fetchone()
+        if row != None:
+            raise ValueError(f'Дата {_str_to_date(row[1])} содержит ключевое слово из файла, на который несколько ссылок, дата не может быть удалена\n{tNavigatorSqliteModel.__keyword_from_row(row)}')
+        removed = {}
+        for row in self.connection.execute(f'SELECT {COLUMNS} FROM keywords{where} ORDER BY date, pos', params):
+            removed.setdefault(_str_to_date(row[1]), []).append(tNavigatorSqliteModel.__keyword_from_row(row))
+        self.connection.execute(f'DELETE FROM keywords{where}', params)
+        self.connection.commit()
+        return removed
+
+    @_locked
+    def view(self, start: datetime = None, end: datetime = None) -> tNavigatorModelView:
+        '''Представление модели на интервале дат [start, end): загружаются только ключевые слова интервала (запрос по индексу дат).
+        Ключевые слова представления - отдельные объекты (см. find_keywords)
+        start: datetime = None - начало интервала (включительно)
+        end: datetime = None - конец интервала (не включительно)'''
+        return tNavigatorModelView(self.__load('keywords', start, end), start, end)
+
+    def __file_digests(self, table: str) -> Dict[str, bytes]:
+        '''Хеши содержимого файлов (тела ключевых слов по порядку дат), вычисляются по мере чтения записей из базы'''
+        digests = {}
+        for path, body in self.connection.execute(f'SELECT include_path, body FROM {table} ORDER BY include_path, date, pos'):
+            if path not in digests:
+                digests[path] = blake2b(digest_size=16)
+            digests[path].update(body.encode('utf-8'))
+        return {x: y.digest() for x, y in digests.items()}
+
+    def __changed_paths(self) -> List[str]:
+        '''Измененные файлы (см. tNavigatorModel.get_changed_files) без загрузки содержимого'''
+        src = self.__file_digests('source_keywords')
+        dest = self.__file_digests('keywords')
+        return [x for x, digest in dest.items() if x not in self.immutable_files and (x not in src or x.upper().startswith('USER') or src[x] != digest)]
+
+    @_locked
+    def get_changed_files(self) -> Dict[str, List[str]]:
+        '''См. tNavigatorModel.get_changed_files: файлы сравниваются по хешам, из базы загружаются только измененные файлы'''
+        changed_files = {}
+        for path in self.__changed_paths():
+            rows = self.connection.execute('SELECT body FROM keywords WHERE include_path = ? ORDER BY date, pos', (path,))
+            changed_files[path] = [line for body, in rows for line in body.splitlines(keepends=True)]
+        return changed_files
+
+    @_locked
+    def to_model(self, include_paths: Iterable[str] = None) -> tNavigatorModel:
+        '''Загрузить модель в память (tNavigatorModel) вместе с исходными данными
+        include_paths: Iterable[str] = None - загрузить только ключевые слова этих файлов (None - всю модель)'''
+        source_sch = self.__load('source_keywords', include_paths=include_paths)
+        model = tNavigatorModel(self.start, [], self.basepath, self.schedule_path, source_sch=source_sch)
+        model.schedule_data = self.__load('keywords', include_paths=include_paths)
+        model.immutable_files = dict(self.immutable_files)
+        model.schedule_kw = self.schedule_kw
+        model.end_kw = self.end_kw
+        return model
+
+    @_locked
+    def shift_dates(self, offset, start: datetime = None, end: datetime = None) -> List[datetime]:
+        '''См. tNavigatorModel.shift_dates (выполняется над моделью, загруженной в память)'''
+        model = self.to_model()
+        result = model.shift_dates(offset, start, end)
+        self.schedule_data = model.schedule_data
+        return result
+
+    @_locked
+    def splice(self, source, offset=None) -> List[datetime]:
+        '''См. tNavigatorModel.splice (выполняется над моделью, загруженной в память)'''
+        model = self.to_model()
+        result = model.splice(source, offset)
+        self.schedule_data = model.schedule_data
+        return result
+
+    @_locked
+    def from_dataframe(self, df: pd.DataFrame):
+        '''См. tNavigatorModel.from_dataframe'''
+        if df.empty:
+            raise ValueError('Нельзя построить модель из пустого DataFrame')
+        self.connection.execute('DELETE FROM keywords')
+        super().from_dataframe(df)
+        self.__save_meta()
+        self.connection.commit()
+
+    @_locked
+    def _save_model(self) -> tNavigatorModel:
+        '''Модель в памяти для сохранения: только файлы, которые могут быть перезаписаны
+        (измененные файлы и файлы с INCLUDE, в которых переименовываются ссылки).
+        Имя без __, так как метод передается через pickle в ProcessPoolExecutor (см. save_as_async)'''
+        paths = set(self.__changed_paths())
+        paths.update(x for x, in self.connection.execute("SELECT DISTINCT include_path FROM keywords WHERE name = 'INCLUDE'"))
+        return self.to_model(paths)
+
+    @staticmethod
+    def __raise_on_errors(report):
+        if not report.ok:
+            raise ValueError(f'Модель не сохранена, найдены ошибки\n{report}')
+
+    def save_as(self, new_name: str, makebackup: bool=False, validate: bool=False):
+        '''См. tNavigatorModel.save_as. В память загружаются только измененные файлы и файлы с INCLUDE
+        (при validate = True модель для проверки загружается целиком)'''
+        if validate:
+            tNavigatorSqliteModel.__raise_on_errors(self.validate())
+        self._save_model().save_as(new_name, makebackup)
+
+    async def save_as_async(self, new_name: str, makebackup: bool=False, executor=None, progress=None, validate: bool=False):
+        '''См. tNavigatorModel.save_as_async и save_as. Загрузка из базы выполняется в executor'''
+        loop = asyncio.get_running_loop()
+        if validate:
+            tNavigatorSqliteModel.__raise_on_errors(await loop.run_in_executor(executor, self.validate))
+        model = await loop.run_in_executor(executor, self._save_model)
+        await model.save_as_async(new_name, makebackup, executor, progress)
+
+    @_locked
+    def close(self):
+        '''Закрыть соединение с базой (при следующем обращении соединение откроется заново)'''
+        if self.__connection is not None:
+            self.__connection.close()
+            self.__connection = None
+
+if __name__ == '__main__':
+    print(tNavigatorSqliteModel.__doc__)
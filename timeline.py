@@ -0,0 +1,153 @@
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .keywords import tNavigatorKeyword
+
+__version__ = '0.1'
+
+class tNavigatorTimeline(object):
+    '''Класс tNavigatorTimeline: временная шкала SCHEDULE-секции.
+    Хранит границы шагов (даты из DATES/TSTEP) массивом numpy.datetime64 и кол-во ключевых слов каждого шага.
+    Позволяет за O(log n) определять шаг по дате и индекс первого ключевого слова шага (в порядке find_keywords())
+    schedule_data: dict - данные модели { datetime: list of tNavigatorKeyword }'''
+    def __init__(self, schedule_data: Dict[datetime, List[tNavigatorKeyword]] = None) -> None:
+        self.rebuild(schedule_data if schedule_data != None else {})
+
+    def rebuild(self, schedule_data: Dict[datetime, List[tNavigatorKeyword]]):
+        '''Перестроить шкалу по данным модели
+        schedule_data: dict - данные модели { datetime: list of tNavigatorKeyword }'''
+        dates = sorted(schedule_data)
+        self.__dates = np.array(dates, dtype='datetime64[us]')
+        self.__counts = np.array([len(schedule_data[x]) for x in dates], dtype=np.int64)
+        self.__index = None
+
+    @staticmethod
+    def from_counts(dates: List[datetime], counts: List[int]) -> 'tNavigatorTimeline':
+        '''Построить шкалу по датам и кол-ву ключевых слов каждой даты (без загрузки самих ключевых слов)
+        dates: List[datetime] - даты по возрастанию
+        counts: List[int] - кол-во ключевых слов каждой даты'''
+        timeline = tNavigatorTimeline()
+        timeline.__dates = np.array(dates, dtype='datetime64[us]')
+        timeline.__counts = np.array(counts, dtype=np.int64)
+        return timeline
+
+    @staticmethod
+    def __to_datetime64(date) -> np.datetime64:
+        return np.datetime64(date, 'us')
+
+    @property
+    def dates(self) -> np.ndarray:
+        '''Границы шагов (numpy.datetime64[us]) по возрастанию'''
+        return self.__dates
+
+    @property
+    def counts(self) -> np.ndarray:
+        '''Кол-во ключевых слов каждого шага'''
+        return self.__counts
+
+    @property
+    def keyword_index(self) -> np.ndarray:
+        '''Индекс первого ключевого слова каждого шага в общем списке ключевых слов модели'''
+        if self.__index is None:
+            self.__index = np.concatenate(([0], np.cumsum(self.__counts)[:-1])) if len(self.__counts) > 0 else np.zeros(0, dtype=np.int64)
+        return self.__index
+
+    @property
+    def cumulative_days(self) -> np.ndarray:
+        '''Кол-во суток от первой даты до каждой границы шага'''
+        if len(self.__dates) == 0:
+            return np.zeros(0)
+        return (self.__dates - self.__dates[0]) / np.timedelta64(1, 'D')
+
+    @property
+    def step_days(self) -> np.ndarray:
+        '''Длительность каждого шага в сутках (для последнего шага - 0)'''
+        return np.append(np.diff(self.cumulative_days), 0.0) if len(self.__dates) > 0 else np.zeros(0)
+
+    def step(self, date: datetime) -> int:
+        '''Номер шага, которому принадлежит дата (-1, если дата раньше первой границы)
+        date: datetime - дата'''
+        return int(np.searchsorted(self.__dates, tNavigatorTimeline.__to_datetime64(date), side='right')) - 1
+
+    def steps(self, dates) -> np.ndarray:
+        '''Номера шагов для массива дат (векторная версия step)
+        dates: массив/список дат'''
+        return np.searchsorted(self.__dates, np.asarray(dates, dtype='datetime64[us]'), side='right') - 1
+
+    def bounds(self, start: datetime = None, end: datetime = None) -> Tuple[int, int]:
+        '''Номера первого и следующего за последним шагов интервала дат [start, end) (срез dates[i:j]), за O(log n)
+        start: datetime = None - начало интервала (включительно), None - без ограничения
+        end: datetime = None - конец интервала (не включительно), None - без ограничения'''
+        i = 0 if start == None else int(np.searchsorted(self.__dates, tNavigatorTimeline.__to_datetime64(start)))
+        j = len(self.__dates) if end == None else int(np.searchsorted(self.__dates, tNavigatorTimeline.__to_datetime64(end)))
+        return i, max(i, j)
+
+    def step_date(self, step: int) -> datetime:
+        '''Дата начала шага
+        step: int - номер шага'''
+        return self.__dates[step].astype(datetime)
+
+    def resample(self, freq: str = 'MS', start: datetime = None, end: datetime = None) -> pd.DataFrame:
+        '''Пересчитать шкалу на отчетные даты. Возвращает pandas.DataFrame ['date', 'step', 'step_date', 'keyword_index', 'days']
+        freq: str = 'MS' - частота отчетных дат в нотации pandas (MS - начало месяца, YS - начало года, ...)
+        start: datetime = None - первая отчетная дата (по умолчанию первая граница шагов)
+        end: datetime = None - последняя отчетная дата (по умолчанию последняя граница шагов)'''
+        columns = ['date', 'step', 'step_date', 'keyword_index', 'days']
+        if len(self.__dates) == 0:
+            return pd.DataFrame(columns=columns)
+        start = self.__dates[0] if start == None else start
+        end = self.__dates[-1] if end == None else end
+        report = pd.date_range(pd.Timestamp(start), pd.Timestamp(end), freq=freq).values.astype('datetime64[us]')
+        steps = self.steps(report)
+        valid = np.clip(steps, 0, None)
+        return pd.DataFrame({'date': report,
+                             'step': steps,
+                             'step_date': np.where(steps >= 0, self.__dates[valid], np.datetime64('NaT')),
+                             'keyword_index': np.where(steps >= 0, self.keyword_index[valid], -1),
+                             'days': (report - self.__dates[0]) / np.timedelta64(1, 'D')}, columns=columns)
+
+    def add(self, date: datetime, n: int = 1):
+        '''Учесть добавление n ключевых слов в дату (новая дата становится новой границей шага)
+        date: datetime - дата
+        n: int = 1 - кол-во добавленных ключевых слов'''
+        dt = tNavigatorTimeline.__to_datetime64(date)
+        i = int(np.searchsorted(self.__dates, dt))
+        if i < len(self.__dates) and self.__dates[i] == dt:
+            self.__counts[i] += n
+        else:
+            self.__dates = np.insert(self.__dates, i, dt)
+            self.__counts = np.insert(self.__counts, i, n)
+        self.__index = None
+
+    def remove(self, date: datetime, n: int = None):
+        '''Учесть удаление n ключевых слов из даты (при n=None или удалении всех ключевых слов удаляется граница шага)
+        date: datetime - дата
+        n: int = None - кол-во удаленных ключевых слов'''
+        dt = tNavigatorTimeline.__to_datetime64(date)
+        i = int(np.searchsorted(self.__dates, dt))
+        if i < len(self.__dates) and self.__dates[i] == dt:
+            if n is not None and self.__counts[i] > n:
+                self.__counts[i] -= n
+            else:
+                self.__dates = np.delete(self.__dates, i)
+                self.__counts = np.delete(self.__counts, i)
+            self.__index = None
+
+    def to_dataframe(self) -> pd.DataFrame:
+        '''Конвертировать шкалу в pandas.DataFrame ['date', 'keyword_index', 'keywords', 'days']'''
+        return pd.DataFrame({'date': self.__dates, 'keyword_index': self.keyword_index,
+                             'keywords': self.__counts, 'days': self.cumulative_days})
+
+    def __len__(self) -> int:
+        return len(self.__dates)
+
+    def __str__(self) -> str:
+        if len(self.__dates) == 0:
+            return 'Кол-во шагов: 0'
+        return f"Кол-во шагов: {len(self.__dates)}\nПериод: {self.__dates[0]} - {self.__dates[-1]}"
+
+if __name__ == '__main__':
+    print(tNavigatorTimeline.__doc__)
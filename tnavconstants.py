@@ -1,3 +1,5 @@
+import re
+
 re_pattern = {
     'keyword' : r"(?i)^\s*(?P<keyword>\w+)\s*(--(?P<comment>.*)){0,1}",
     'DATES' : r"(?i)^\s*(?P<day>\d{1,2})\s*('?(?P<month>[A-Z]{3})'?)\s*(?P<year>\d{4})(\s+(?P<time>\d{2}:\d{2}:\d{2}([.]\d{4})?))?\s*/",
@@ -122,5 +124,31 @@ keywords_tNav = {'FRACTURE_STAGE', 'REPORTSCREEN', 'SKIPTNAV', 'COREYWO', 'INTER
 
 keywords_without_slash_symbol = {'TUNING', 'SKIPTEST', 'SCHEDULE', 'INCLUDE', 'COMPOFF', 'VFPPROD', 'WELLTRACK'}
 
+# ключевые слова со списком записей: список завершается пустой записью /
+multi_record_keywords = {'DATES', 'WELSPECS', 'COMPDAT', 'COMPDATL', 'COMPDATMD', 'COMPORD', 'COMPLUMP', 'COMPSEGS', 'WELSEGS', 'WCONPROD', 
+'WCONHIST', 'WCONINJE', 'WCONINJH', 'WCONINJP', 'WEFAC', 'GEFAC', 'WELTARG', 'WELOPEN', 'WELDRAW', 'WECON', 'WECONINJ', 'GECON', 
+'GCONPROD', 'GCONINJE', 'GCONSALE', 'GCONSUMP', 'GRUPTREE', 'GRUPNET', 'GPMAINT', 'GSATPROD', 'WGRUPCON', 'WLIST', 'WPIMULT', 
+'WRFT', 'WRFTPLT', 'WTEST', 'WTRACER', 'WPOLYMER', 'WSALT', 'WTEMP', 'WINJTEMP', 'WLIFT', 'WDRILTIM', 'WBHGLR', 'WVFPEXP', 
+'WSEGVALV', 'WSEGAICD', 'WSEGSICD', 'WPAVEDEP', 'WCYCLE', 'WHTEMP', 'WINJGAS', 'WSURFACT', 'NODEPROP', 'BRANPROP', 'WELLSHUT', 'WELLOPEN'}
+
+# ключевые слова с фиксированным кол-вом записей (одна запись, таблицы VFP, TUNING): не завершаются пустой записью /
+fixed_record_keywords = {'TSTEP', 'TIME', 'NEXTSTEP', 'NEXTSTPL', 'NEXT', 'DRSDT', 'DRVDT', 'DRSDTR', 'DRVDTR', 'DRSDTCON', 'RPTSCHED', 'RPTRST', 
+'GCONTOL', 'LIFTOPT', 'NETBALAN', 'WSEGITER', 'NUPCOL', 'GUIDERAT', 'WPAVE', 'MESSAGES', 'PRIORITY', 'WHISTCTL', 'CVCRIT', 'VAPPARS', 
+'TUNING', 'TUNINGDP', 'TUNINGL', 'ZIPPY2', 'OPTIONS', 'PICOND', 'VFPPROD', 'VFPINJ'}
+
 keywords = {*keywords, *keywords_tNav}
 
+# имена значений записей ключевых слов (используются records.parse_records)
+record_columns = {
+    'COMPDAT' : ['well', 'i', 'j', 'k1', 'k2', 'status', 'satnum', 'cf', 'diam', 'kh', 'skin', 'dfact', 'dir', 'r0'],
+    'WELSPECS' : ['well', 'group', 'i', 'j', 'depth', 'phase', 'drainage', 'inflow', 'shutin', 'xflow', 'pvttab', 'density', 'fipnet'],
+    'WCONPROD' : ['well', 'status', 'cmode', 'orat', 'wrat', 'grat', 'lrat', 'resv', 'bhp', 'thp', 'vfp', 'alq'],
+    'WCONHIST' : ['well', 'status', 'cmode', 'orat', 'wrat', 'grat', 'vfp', 'alq', 'thp', 'bhp', 'wgrat', 'nglrat'],
+    'WCONINJE' : ['well', 'type', 'status', 'cmode', 'rate', 'resv', 'bhp', 'thp', 'vfp'],
+    'WCONINJH' : ['well', 'type', 'status', 'rate', 'bhp', 'thp', 'vfp', 'ctrl', 'cmode'],
+    'WEFAC' : ['well', 'coef', 'use'],
+    'GEFAC' : ['group', 'coef', 'use'],
+}
+
+# скомпилированные шаблоны re_pattern (компилируются один раз при импорте)
+re_compiled = {key: re.compile(value, re.MULTILINE) for key, value in re_pattern.items()}
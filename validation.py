@@ -0,0 +1,183 @@
+import re
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import datetime
+from os.path import dirname, exists, join, normpath
+from typing import List
+
+import pandas as pd
+
+from . import tnavconstants as tnav
+from .keywords import tNavigatorKeyword
+
+# значения в кавычках (могут содержать символ /)
+re_quoted = re.compile(r"'[^']*'")
+
+__version__ = '0.1'
+
+ERROR = 'error'
+WARNING = 'warning'
+
+class ValidationIssue(object):
+    '''Класс ValidationIssue: одна найденная ошибка
+    check: str - название проверки
+    message: str - описание ошибки
+    keyword: tNavigatorKeyword = None - ключевое слово
+    date: datetime = None - дата ключевого слова
+    severity: str = 'error' - важность (error, warning)'''
+    def __init__(self, check: str, message: str, keyword: tNavigatorKeyword = None, date: datetime = None, severity: str = ERROR) -> None:
+        self.check = check
+        self.message = message
+        self.keyword = keyword
+        self.date = date
+        self.severity = severity
+
+    def __str__(self) -> str:
+        name = self.keyword.name if self.keyword is not None else ''
+        path = self.keyword.include_path if self.keyword is not None else ''
+        return f'[{self.severity}] {self.date} {path} {name}: {self.message}'
+
+class ValidationReport(object):
+    '''Класс ValidationReport: результат проверки модели
+    issues: List[ValidationIssue] - найденные ошибки
+    checked: int - кол-во проверенных ключевых слов'''
+    def __init__(self, issues: List[ValidationIssue], checked: int) -> None:
+        self.issues = issues
+        self.checked = checked
+
+    @property
+    def errors(self) -> List[ValidationIssue]:
+        return [x for x in self.issues if x.severity == ERROR]
+
+    @property
+    def warnings(self) -> List[ValidationIssue]:
+        return [x for x in self.issues if x.severity == WARNING]
+
+    @property
+    def ok(self) -> bool:
+        '''Модель не содержит ошибок (предупреждения допускаются)'''
+        return len(self.errors) == 0
+
+    def to_dataframe(self) -> pd.DataFrame:
+        '''Конвертировать отчет в pandas.DataFrame ['date', 'keyword', 'include', 'severity', 'check', 'message']'''
+        columns = ['date', 'keyword', 'include', 'severity', 'check', 'message']
+        return pd.DataFrame([{'date': x.date,
+                              'keyword': x.keyword.name if x.keyword is not None else None,
+                              'include': x.keyword.include_path if x.keyword is not None else None,
+                              'severity': x.severity, 'check': x.check, 'message': x.message} for x in self.issues], columns=columns)
+
+    def __str__(self) -> str:
+        text = f"Проверено ключевых слов: {self.checked}\nОшибок: {len(self.errors)}\nПредупреждений: {len(self.warnings)}"
+        return '\n'.join([text] + [str(x) for x in self.issues])
+
+def check_keyword(name: str, body: List[str]) -> List[tuple]:
+    '''Проверки одного ключевого слова по его тексту. Возвращает список (проверка, сообщение, важность)
+    1. начинается c ключевого слова и это ключевое слово == name
+    2. каждая запись заканчивается символом /, кавычки закрыты
+    3. список записей завершается пустой записью /: ошибка для ключевых слов из multi_record_keywords,
+    предупреждение для ключевых слов, кол-во записей которых неизвестно (кроме keywords_without_slash_symbol и fixed_record_keywords)
+    name: str - ключевое слово
+    body: List[str] - строки ключевого слова'''
+    if len(body) == 0:
+        return [('name', 'Пустое ключевое слово', ERROR)]
+    issues = []
+    search = tnav.re_compiled['keyword'].match(body[0])
+    if not search or search.group('keyword').upper() != name:
+        issues.append(('name', f'Первая строка не начинается с ключевого слова {name}', ERROR))
+    # текст без ключевого слова и комментариев (см. tNavigatorKeyword.get_body_value_text)
+    text = ''.join(line if '--' not in line else line[:line.find('--')] for line in body[1:])
+    if text.count("'") % 2 != 0:
+        issues.append(('quotes', 'Не закрыты кавычки', ERROR))
+    if name not in tnav.keywords_without_slash_symbol:
+        # значения в кавычках заменяются пробелами той же длины, чтобы символ / в них не разделял записи
+        records = re_quoted.sub(lambda x: "'" + ' ' * (len(x.group()) - 2) + "'", text).split('/')
+        if records[-1].strip() != '':
+            issues.append(('record', f'Запись не завершена символом /: {text[-len(records[-1]):].strip()[:50]}', ERROR))
+        elif len(records) > 1 and records[-2].strip() != '' and name not in tnav.fixed_record_keywords:
+            if name in tnav.multi_record_keywords:
+                issues.append(('slash', 'Ключевое слово не завершено пустой записью /', ERROR))
+            else:
+                issues.append(('slash', 'Ключевое слово не завершено пустой записью / (если ключевое слово из одной записи, это не ошибка)', WARNING))
+    return issues
+
+def _check_chunk(chunk: List[tuple]) -> List[tuple]:
+    result = []
+    for i, name, body in chunk:
+        result += [(i, *issue) for issue in check_keyword(name, body)]
+    return result
+
+def _check_dates(start: datetime, data: List[tuple]) -> List[ValidationIssue]:
+    '''DATES должны соответствовать дате модели и строго возрастать, дата TSTEP - совпадать с предыдущей датой + шаг'''
+    issues = []
+    previous = start
+    for date, keywords in data:
+        for kw in keywords:
+            if kw.name == 'TSTEP':
+                if previous != None:
+                    expected = previous + kw.get_value()
+                    if expected != date:
+                        issues.append(ValidationIssue('dates', f'Дата {date} не совпадает с датой {expected}, заданной TSTEP от {previous}', kw, date))
+                    previous = expected
+                continue
+            if kw.name != 'DATES':
+                continue
+            value = kw.get_value()
+            if value == None:
+                issues.append(ValidationIssue('dates', 'Не удалось разобрать дату', kw, date))
+                continue
+            if value != date:
+                issues.append(ValidationIssue('dates', f'Дата {value} не совпадает с датой модели {date}', kw, date))
+            if previous != None and value <= previous:
+                issues.append(ValidationIssue('dates', f'Дата {value} не больше предыдущей {previous}', kw, date))
+            previous = value
+    return issues
+
+def _check_includes(model, data: List[tuple]) -> List[ValidationIssue]:
+    '''Файлы INCLUDE должны существовать (путь относительно файла с INCLUDE или главного файла модели)'''
+    if model.model_name == None:
+        return []
+    issues = []
+    checked = {}
+    for date, keywords in data:
+        for kw in keywords:
+            if kw.name != 'INCLUDE':
+                continue
+            value = kw.get_value()
+            if value == None:
+                issues.append(ValidationIssue('include', 'Не удалось разобрать путь к файлу', kw, date))
+                continue
+            key = (kw.include_path, value)
+            if key not in checked:
+                parent = '' if kw.include_path == '/' else dirname(kw.include_path)
+                checked[key] = exists(normpath(join(model.model_dirname, parent, value))) or exists(normpath(join(model.model_dirname, value)))
+            if not checked[key]:
+                issues.append(ValidationIssue('include', f'Файл {value} не найден', kw, date))
+    return issues
+
+def validate_model(model, processes: int = 0, chunk_size: int = 5000, executor: Executor = None) -> ValidationReport:
+    '''Проверить все ключевые слова модели. Проверки ключевых слов выполняются в текущем процессе или в пуле процессов (частями по chunk_size),
+    проверки DATES/TSTEP и INCLUDE - по всей модели.
+    По умолчанию пул не используется: проверка одного ключевого слова (~2 мкс) дешевле его передачи в другой процесс
+    (~4 мкс, замер на модели из 82 тыс. ключевых слов), пул имеет смысл только для переданного executor с дополнительными проверками
+    model: tNavigatorModel - модель
+    processes: int = 0 - кол-во процессов (0 - без пула, None - по кол-ву ядер). Модели меньше chunk_size ключевых слов проверяются без пула
+    chunk_size: int = 5000 - кол-во ключевых слов в одной задаче
+    executor: concurrent.futures.Executor = None - уже созданный пул для проверки (не закрывается), заменяет processes'''
+    data = sorted(model.schedule_data.items())
+    keywords = [(date, kw) for date, kws in data for kw in kws]
+    if (executor is None and processes == 0) or len(keywords) <= chunk_size:
+        found = [(i, *issue) for i, (date, kw) in enumerate(keywords) for issue in check_keyword(kw.name, kw.body)]
+    else:
+        items = [(i, kw.name, kw.body) for i, (date, kw) in enumerate(keywords)]
+        chunks = [items[i:i+chunk_size] for i in range(0, len(items), chunk_size)]
+        if executor is not None:
+            found = [x for chunk in executor.map(_check_chunk, chunks) for x in chunk]
+        else:
+            with ProcessPoolExecutor(max_workers=processes) as pool:
+                found = [x for chunk in pool.map(_check_chunk, chunks) for x in chunk]
+    issues = [ValidationIssue(check, message, keywords[i][1], keywords[i][0], severity) for i, check, message, severity in found]
+    issues += _check_dates(model.start, data)
+    issues += _check_includes(model, data)
+    return ValidationReport(issues, len(keywords))
+
+if __name__ == '__main__':
+    print(validate_model.__doc__)
@@ -0,0 +1,56 @@
+from datetime import datetime
+from typing import Dict, Iterator, List, Tuple
+
+from .keywords import tNavigatorKeyword
+from .timeline import tNavigatorTimeline
+
+__version__ = '0.1'
+
+class tNavigatorModelView(object):
+    '''Класс tNavigatorModelView: представление модели на интервале дат [start, end) без копирования ключевых слов.
+    Списки ключевых слов берутся напрямую из schedule_data, поэтому изменения ключевых слов видны в модели.
+    Даты интервала определяются бинарным поиском по временной шкале, поэтому стоимость обращения зависит только от размера интервала
+    schedule_data: dict - данные модели { datetime: list of tNavigatorKeyword }
+    start: datetime = None - начало интервала (включительно), None - без ограничения
+    end: datetime = None - конец интервала (не включительно), None - без ограничения
+    timeline: tNavigatorTimeline = None - временная шкала schedule_data (см. tNavigatorModel.timeline), при None строится один раз'''
+    def __init__(self, schedule_data: Dict[datetime, List[tNavigatorKeyword]], start: datetime = None, end: datetime = None, timeline: tNavigatorTimeline = None) -> None:
+        self.__sch_data = schedule_data
+        self.__timeline = timeline if timeline is not None else tNavigatorTimeline(schedule_data)
+        self.start = start
+        self.end = end
+
+    @property
+    def dates(self) -> List[datetime]:
+        '''Даты интервала по возрастанию'''
+        i, j = self.__timeline.bounds(self.start, self.end)
+        return self.__timeline.dates[i:j].tolist()
+
+    def items(self) -> Iterator[Tuple[datetime, List[tNavigatorKeyword]]]:
+        '''Пары (дата, список ключевых слов) по возрастанию дат'''
+        for date in self.dates:
+            yield date, self.__sch_data[date]
+
+    def __iter__(self) -> Iterator[tNavigatorKeyword]:
+        for date, keywords in self.items():
+            yield from keywords
+
+    def __contains__(self, date: datetime) -> bool:
+        return date in self.__sch_data and (self.start == None or date >= self.start) and (self.end == None or date < self.end)
+
+    def __len__(self) -> int:
+        i, j = self.__timeline.bounds(self.start, self.end)
+        return j - i
+
+    def find_keywords(self, keyword: str = None, comment: str = None) -> List[tNavigatorKeyword]:
+        '''Найти ключевые слова интервала по заданным параметрам (вызов без параметров вернет ВСЕ ключевые слова интервала)
+        keyword: str = None - название ключевого слова
+        comment: str = None - коментарий ключевого слова (без --)'''
+        return [x for x in self if (keyword == None or x.name == keyword) and (comment == None or x.get_comment() == comment)]
+
+    def __str__(self) -> str:
+        i, j = self.__timeline.bounds(self.start, self.end)
+        return f"Интервал: [{self.start}, {self.end})\nКол-во дат: {j - i}\nКол-во ключевых слов: {int(self.__timeline.counts[i:j].sum())}"
+
+if __name__ == '__main__':
+    print(tNavigatorModelView.__doc__)